@@ -1,197 +1,532 @@
 import streamlit as st
+import os
+import tempfile
 import time
 import plotly.graph_objects as go
+import plotly.io as pio
+import streamlit.components.v1 as components
+
+import checkpoint
+from event_log import EventLog
+from frame_cache import FrameCache
+from instrumentation import instruments
+from runner import SimulationRunner, shared_runner
+from simulator import (
+    INITIAL_STATE, MAX_TOTAL_BLOCKS, STATE_FIELDS,
+    GravityBatterySimulator, SimulationConfig, StepResult,
+)
+from telemetry import TelemetrySink
+from towers import BIG_CYCLE_MODES, TowerArray
 
 st.set_page_config(page_title="Gravity Battery - Seesaw Simulation", layout="wide")
 
 # ---------- CONFIG ----------
 FRAME_DELAY = 0.1   # seconds per animation frame (lower = faster)
-GRAVITY = 9.81      # m/s²
-HEIGHT = 100        # m (from +50m to -50m)
-B1_CAPACITY = 100_000  # Joules (100 kJ for Battery 1)
-B2_CAPACITY = 1_000_000  # Joules (1 MJ for Battery 2)
-STORAGE_THRESHOLD = 80  # kg to trigger big cycle
-MAX_TOTAL_BLOCKS = 20  # Max blocks (200kg) at A and B combined
+FRAME_CACHE_SIZE = 1024  # max pre-rendered frames kept (shared by all sessions)
+CLIENT_TICK = 0.5   # seconds between checks for the end of a client-side transition
+SIM_TICK = 0.5      # seconds per step of the background simulation
+UI_POLL = 0.25      # seconds between UI refreshes from the background simulation
+RUNNER_IDLE_TIMEOUT = 30.0  # seconds without a UI refresh (e.g. closed tab) before a background simulation stops
+TURBO_CHUNK = 256   # steps between time-budget checks in turbo mode
+LOG_CAPACITY = 1000  # events kept in memory
+LOG_WINDOW = 100    # most recent events shown in the log panel
+LOG_SPILL_PATH = None  # file to append every event to (binary, see event_log.read_spill)
+TELEMETRY_DIR = None  # directory to stream per-step telemetry to, one new run-* subdirectory per Start
+TELEMETRY_FLUSH_EVERY = 5.0  # max seconds a telemetry row waits in memory before it is written
+INSTRUMENTATION = False  # time the hot paths and show a profiling panel (see instrumentation.py)
+CHECKPOINT_PATH = None  # file to autosave the simulator state to and restore new sessions from
+CHECKPOINT_EVERY = 100  # steps between autosaves to CHECKPOINT_PATH
+SHARED_SCENARIOS = {  # simulations run once per server process and watched read-only by every viewer
+    "Demo": {},
+    "Balanced start (2 + 2 blocks)": {"blocks_top_A": 2, "blocks_top_B": 2},
+}
+
+instruments.enabled = INSTRUMENTATION
+
+# ---------- CHECKPOINTS ----------
+def checkpoint_state(sim):
+    """State of a loaded checkpoint; the app always runs SimulationConfig(), so other configs are rejected."""
+    if sim.config != SimulationConfig():
+        raise ValueError(f"Checkpoint was saved with a different configuration ({sim.config}) than this app runs.")
+    return sim.to_state()
 
 # ---------- SESSION STATE ----------
-if "blocks_top_A" not in st.session_state:
-    st.session_state.blocks_top_A = 1  # initial 10 kg = 1 block
-if "blocks_top_B" not in st.session_state:
-    st.session_state.blocks_top_B = 2  # initial 20 kg = 2 blocks
-if "tied_bottom_C" not in st.session_state:
-    st.session_state.tied_bottom_C = 0
-if "tied_bottom_D" not in st.session_state:
-    st.session_state.tied_bottom_D = 0
-if "storage_left" not in st.session_state:
-    st.session_state.storage_left = 0
-if "storage_right" not in st.session_state:
-    st.session_state.storage_right = 0
-if "battery1" not in st.session_state:
-    st.session_state.battery1 = 0  # small battery % (0-100)
-if "battery2" not in st.session_state:
-    st.session_state.battery2 = 0  # big battery % (0-100)
-if "generator_angle" not in st.session_state:
-    st.session_state.generator_angle = 0
-if "houses_lit" not in st.session_state:
-    st.session_state.houses_lit = False
+for _name, _value in INITIAL_STATE.items():
+    if _name not in st.session_state:
+        st.session_state[_name] = _value
 if "running" not in st.session_state:
     st.session_state.running = False
 if "stop_requested" not in st.session_state:
     st.session_state.stop_requested = False
 if "logs" not in st.session_state:
-    st.session_state.logs = []
-if "step_count" not in st.session_state:
-    st.session_state.step_count = 0
+    st.session_state.logs = EventLog(LOG_CAPACITY, spill_path=LOG_SPILL_PATH)
+if "next_step_at" not in st.session_state:
+    st.session_state.next_step_at = 0.0
+if "runner" not in st.session_state:
+    st.session_state.runner = None
+if "telemetry" not in st.session_state:
+    st.session_state.telemetry = None
+if "turbo_rate" not in st.session_state:
+    st.session_state.turbo_rate = None
+if "towers" not in st.session_state:
+    st.session_state.towers = None
+    st.session_state.towers_from = None
+if "rerun_requested_at" not in st.session_state:
+    st.session_state.rerun_requested_at = None
+if "checkpoint_step" not in st.session_state:
+    # New session (browser refresh or server restart): pick up the last autosave
+    if CHECKPOINT_PATH is not None and os.path.exists(CHECKPOINT_PATH):
+        try:
+            st.session_state.update(checkpoint_state(checkpoint.load(CHECKPOINT_PATH)))
+            st.session_state.logs.message(
+                f"Restored checkpoint at step {st.session_state.step_count}. Press Resume to continue.", st.session_state
+            )
+        except ValueError as e:
+            st.session_state.logs.message(f"Ignored checkpoint {CHECKPOINT_PATH}: {e}")
+    st.session_state.checkpoint_step = st.session_state.step_count
+
+# ---------- INSTRUMENTATION ----------
+def pause(seconds):
+    with instruments.phase("sleep"):
+        time.sleep(seconds)
+
+def rerun():
+    """Like st.rerun, but times how long it takes until the script starts again."""
+    if instruments.enabled:
+        st.session_state.rerun_requested_at = time.perf_counter()
+    st.rerun()
+
+if st.session_state.rerun_requested_at is not None:
+    instruments.record("rerun", time.perf_counter() - st.session_state.rerun_requested_at)
+    st.session_state.rerun_requested_at = None
 
 # ---------- DRAW / ANIMATION HELPERS ----------
-def draw_scene(moving_blocks=None, note=""):
+@st.cache_resource
+def get_frame_cache():
+    return FrameCache(maxsize=FRAME_CACHE_SIZE)
+
+def status_labels(state):
+    """Texts of the generator, B1, B2 and houses annotations (always the last four in a scene)."""
+    angle = state["generator_angle"] % 360
+    return (
+        f"⚙ {angle:.0f}°",
+        f"🔋 B1: {state['battery1']:.0f}%",
+        f"🔋 B2: {state['battery2']:.0f}%",
+        "🏠 lit" if state["houses_lit"] else "🏠 dark",
+    )
+
+def scene_key(state, moving_blocks=None):
+    """Everything draw_scene depends on except the status label texts."""
+    return (
+        state["blocks_top_A"],
+        state["blocks_top_B"],
+        state["tied_bottom_C"] > 0,
+        state["tied_bottom_D"] > 0,
+        state["storage_left"] // 10,
+        state["storage_right"] // 10,
+        tuple(moving_blocks or ()),
+    )
+
+def show_scene(placeholder, moving_blocks=None, state=None):
+    """
+    Render the scene, reusing a cached figure for the same blocks and only refreshing its status labels.
+    `state` is any mapping of STATE_FIELDS (default: this session's own run).
+    """
+    state = st.session_state if state is None else state
+    cache = get_frame_cache()
+    key = scene_key(state, moving_blocks)
+    with cache.lock:
+        fig = cache.get(key)
+        if fig is None:
+            instruments.count("frame_cache_misses")
+            fig = draw_scene(moving_blocks=moving_blocks, state=state)
+            cache.put(key, fig)
+        else:
+            instruments.count("frame_cache_hits")
+            for annotation, text in zip(fig.layout.annotations[-4:], status_labels(state)):
+                annotation.text = text
+        with instruments.phase("plotly_chart"):
+            placeholder.plotly_chart(fig, use_container_width=True)
+
+def moving_block_x(pt):
+    if pt == "left":
+        return -2.1, -1.5
+    if pt == "right":
+        return 1.5, 2.1
+    if pt == "BIG":
+        return -1.2, 1.2
+    if pt == "STORAGE":
+        return -0.8, 0.8  # Smaller width for 80kg
+    return -0.6, 0.6
+
+def scene_base():
+    """Static layer of the scene (ground, point labels, generator, axes), built once per session."""
+    if "scene_base" not in st.session_state:
+        st.session_state.scene_base = {
+            # Ground line
+            "under": [dict(type="line", x0=-3, y0=0, x1=3, y1=0, line=dict(color="black", width=3))],
+            # Generator visual, drawn above the moving blocks
+            "over": [dict(type="circle", x0=-0.4, y0=-20.6, x1=0.4, y1=-21.6, line=dict(color="orange", width=3))],
+            # Labels for points
+            "annotations": [
+                dict(x=-1.8, y=55, text="A (+50m)", showarrow=False, font=dict(size=12)),
+                dict(x=1.8, y=55, text="B (+50m)", showarrow=False, font=dict(size=12)),
+                dict(x=-1.8, y=-55, text="C (−50m)", showarrow=False, font=dict(size=12)),
+                dict(x=1.8, y=-55, text="D (−50m)", showarrow=False, font=dict(size=12)),
+            ],
+            "layout": dict(
+                xaxis=dict(visible=False, range=[-4, 4]),
+                yaxis=dict(visible=False, range=[-65, 65]),
+                height=600,
+                margin=dict(l=10, r=10, t=10, b=10),
+                autosize=True,
+            ),
+        }
+    return st.session_state.scene_base
+
+def stack_shape(x0, x1, spans, color):
+    """One path shape for a column of stacked blocks; spans are (y0, y1) per block."""
+    path = " ".join(f"M{x0},{y0:g}H{x1}V{y1:g}H{x0}Z" for y0, y1 in spans)
+    return dict(type="path", path=path, fillcolor=color, line=dict(color="black"))
+
+def stack_columns(state):
+    """
+    (x0, x1, spans, color) of the block columns at top A, top B, tied C, tied D,
+    storage left and storage right, always in that order; spans is empty for
+    a column without blocks.
+    """
+    base_y = -51.05
+    return [
+        # Stacked blocks at top A (left, blue) and top B (right, red)
+        (-2.1, -1.5, [(50 + i * 3.5, 50 + i * 3.5 + 3.0) for i in range(state["blocks_top_A"])], "#2b6cb0"),
+        (1.5, 2.1, [(50 + i * 3.5, 50 + i * 3.5 + 3.0) for i in range(state["blocks_top_B"])], "#c53030"),
+        # Tied block at bottom C / D (gray if present)
+        (-2.1, -1.5, [(-51, -50.05)] if state["tied_bottom_C"] > 0 else [], "gray"),
+        (1.5, 2.1, [(-151, -150.05)] if state["tied_bottom_D"] > 0 else [], "gray"),
+        # Stored blocks at left / right (below tied, orange)
+        (-2.1, -1.5, [(base_y - i * 3.5 - 3, base_y - i * 3.5) for i in range(state["storage_left"] // 10)], "#dd6b20"),
+        (1.5, 2.1, [(base_y - i * 3.5 - 3, base_y - i * 3.5) for i in range(state["storage_right"] // 10)], "#dd6b20"),
+    ]
+
+def scene_stacks(state):
+    """Shapes for the blocks resting at A/B, tied at C/D and stored underground."""
+    return [stack_shape(x0, x1, spans, color) for x0, x1, spans, color in stack_columns(state) if spans]
+
+def scene_patch(state, moving_blocks=None):
+    """Per-frame shapes and annotations: moving blocks with their labels, then the status labels."""
+    shapes = []
+    annotations = []
+    # Moving blocks (dropping or lifting)
+    for pt, color, y, size_kg, label in moving_blocks or ():
+        if size_kg == 0:  # Skip if no block to animate
+            continue
+        x0, x1 = moving_block_x(pt)
+        shapes.append(dict(type="rect", x0=x0, x1=x1, y0=y, y1=y + 3, fillcolor=color, line=dict(color="black")))
+        annotations.append(dict(x=(x0 + x1) / 2, y=y + 1.2, text=f"{label}: {size_kg}kg", showarrow=False))
+
+    angle_text, b1_text, b2_text, houses_text = status_labels(state)
+    annotations += [
+        # Generator angle
+        dict(x=0, y=-21.1, text=angle_text, showarrow=False, font=dict(color="orange")),
+        # Battery labels
+        dict(x=-2.7, y=45, text=b1_text, showarrow=False),
+        dict(x=2.7, y=45, text=b2_text, showarrow=False),
+        # Houses indicator
+        dict(x=0, y=45, text=houses_text, showarrow=False),
+    ]
+    return shapes, annotations
+
+def scene_layout(state, moving_blocks=None):
+    """Plain layout dict of the scene: static base + block stacks + per-frame patch."""
+    base = scene_base()
+    patch_shapes, patch_annotations = scene_patch(state, moving_blocks)
+    return dict(
+        base["layout"],
+        shapes=base["under"] + scene_stacks(state) + patch_shapes + base["over"],
+        annotations=base["annotations"] + patch_annotations,
+    )
+
+def draw_scene(moving_blocks=None, note="", state=None):
     """
     moving_blocks: None or list of tuples [(point_name, color, y, size_kg, label), ...]
     point_name: 'left'/'right'/'BIG'/'STORAGE'
     y: y coordinate of top of the moving rectangle
     size_kg: kg size for annotation (10, 20, 80, or 160)
     label: "Dropping" or "Lifting"
+    state: mapping of STATE_FIELDS to draw (default: this session's own run)
     """
-    fig = go.Figure()
-    # Ground line
-    fig.add_shape(type="line", x0=-3, y0=0, x1=3, y1=0, line=dict(color="black", width=3))
-    # Labels for points
-    fig.add_annotation(x=-1.8, y=55, text="A (+50m)", showarrow=False, font=dict(size=12))
-    fig.add_annotation(x=1.8, y=55, text="B (+50m)", showarrow=False, font=dict(size=12))
-    fig.add_annotation(x=-1.8, y=-55, text="C (−50m)", showarrow=False, font=dict(size=12))
-    fig.add_annotation(x=1.8, y=-55, text="D (−50m)", showarrow=False, font=dict(size=12))
-
-    # Draw stacked blocks at top A (left, blue)
-    for i in range(st.session_state.blocks_top_A):
-        y0 = 50 + i * 3.5
-        fig.add_shape(type="rect", x0=-2.1, x1=-1.5, y0=y0, y1=y0 + 3.0, fillcolor="#2b6cb0", line=dict(color="black"))
-    # Draw stacked blocks at top B (right, red)
-    for i in range(st.session_state.blocks_top_B):
-        y0 = 50 + i * 3.5
-        fig.add_shape(type="rect", x0=1.5, x1=2.1, y0=y0, y1=y0 + 3.0, fillcolor="#c53030", line=dict(color="black"))
-
-    # Tied block at bottom C (left, gray if present)
-    if st.session_state.tied_bottom_C > 0:
-        fig.add_shape(type="rect", x0=-2.1, x1=-1.5, y0=-51, y1=-50.05, fillcolor="gray", line=dict(color="black"))
-    # Tied block at bottom D (right, gray if present)
-    if st.session_state.tied_bottom_D > 0:
-        fig.add_shape(type="rect", x0=1.5, x1=2.1, y0=-151, y1=-150.05, fillcolor="gray", line=dict(color="black"))
-
-    # Stored blocks at left (below tied, orange)
-    num_stored_left = st.session_state.storage_left // 10
-    base_y_left = -51.05
-    for i in range(num_stored_left):
-        y1 = base_y_left - i * 3.5
-        y0 = y1 - 3
-        fig.add_shape(type="rect", x0=-2.1, x1=-1.5, y0=y0, y1=y1, fillcolor="#dd6b20", line=dict(color="black"))
-    # Stored blocks at right (below tied, orange)
-    num_stored_right = st.session_state.storage_right // 10
-    base_y_right = -51.05
-    for i in range(num_stored_right):
-        y1 = base_y_right - i * 3.5
-        y0 = y1 - 3
-        fig.add_shape(type="rect", x0=1.5, x1=2.1, y0=y0, y1=y1, fillcolor="#dd6b20", line=dict(color="black"))
+    with instruments.phase("draw_scene"):
+        return go.Figure(layout=scene_layout(st.session_state if state is None else state, moving_blocks))
 
-    # Moving blocks (dropping or lifting)
-    if moving_blocks:
-        for pt, color, y, size_kg, label in moving_blocks:
-            if size_kg == 0:  # Skip if no block to animate
-                continue
-            if pt == "left":
-                x0, x1 = -2.1, -1.5
-            elif pt == "right":
-                x0, x1 = 1.5, 2.1
-            elif pt == "BIG":
-                x0, x1 = -1.2, 1.2
-            elif pt == "STORAGE":
-                x0, x1 = -0.8, 0.8  # Smaller width for 80kg
-            else:
-                x0, x1 = -0.6, 0.6
-            fig.add_shape(type="rect", x0=x0, x1=x1, y0=y, y1=y + 3, fillcolor=color, line=dict(color="black"))
-            fig.add_annotation(x=(x0 + x1) / 2, y=y + 1.2, text=f"{label}: {size_kg}kg", showarrow=False)
-
-    # Generator visual and angle
-    angle = st.session_state.generator_angle % 360
-    fig.add_shape(type="circle", x0=-0.4, y0=-20.6, x1=0.4, y1=-21.6, line=dict(color="orange", width=3))
-    fig.add_annotation(x=0, y=-21.1, text=f"⚙ {angle:.0f}°", showarrow=False, font=dict(color="orange"))
-
-    # Battery labels
-    fig.add_annotation(x=-2.7, y=45, text=f"🔋 B1: {st.session_state.battery1:.0f}%", showarrow=False)
-    fig.add_annotation(x=2.7, y=45, text=f"🔋 B2: {st.session_state.battery2:.0f}%", showarrow=False)
-
-    # Houses indicator
-    houses_text = "🏠 lit" if st.session_state.houses_lit else "🏠 dark"
-    fig.add_annotation(x=0, y=45, text=houses_text, showarrow=False)
-
-    fig.update_xaxes(visible=False, range=[-4, 4])
-    fig.update_yaxes(visible=False, range=[-65, 65])
-    fig.update_layout(height=600, margin=dict(l=10, r=10, t=10, b=10), autosize=True)
-    return fig
-
-def animate_seesaw(placeholder, drop_side, drop_color, lift_side, lift_color, drop_size=20, lift_size=10, steps=50):
+def seesaw_frames(drop_side, drop_color, lift_side, lift_color, drop_size=20, lift_size=10, steps=50):
+    """moving_blocks for every frame of a small drop (see draw_scene)."""
     start_drop_y = 50
     end_drop_y = -50
     start_lift_y = -50
     end_lift_y = 50
+    frames = []
     for step in range(steps):
-        if st.session_state.stop_requested:
-            st.session_state.logs.append("Animation stopped due to user request.")
-            return False
         t = step / (steps - 1)
         drop_y = start_drop_y + (end_drop_y - start_drop_y) * t
         lift_y = start_lift_y + (end_lift_y - start_lift_y) * t if lift_size > 0 else None
         moving_blocks = [(drop_side, drop_color, drop_y, drop_size, "Dropping")]
         if lift_size > 0:
             moving_blocks.append((lift_side, lift_color, lift_y, lift_size, "Lifting"))
-        fig = draw_scene(moving_blocks=moving_blocks)
-        placeholder.plotly_chart(fig, use_container_width=True)
-        time.sleep(FRAME_DELAY)
-    st.session_state.logs.append(f"Completed animation: Dropped {drop_size}kg from {drop_side}, Lifted {lift_size}kg to {lift_side}")
-    return True
+        frames.append(moving_blocks)
+    return frames
 
-def animate_big_cycle(placeholder, steps=60):
-    # First, simultaneous drop 160kg and lift 80kg
+def big_cycle_frames(steps=60):
+    """moving_blocks for both big-cycle phases: drop 160kg / lift 80kg, then lift 160kg back up."""
     start_drop_y = 50
     end_drop_y = -50
     start_lift_y = -50
     end_lift_y = 50
+    drop_phase = []
+    lift_phase = []
     for step in range(steps):
-        if st.session_state.stop_requested:
-            st.session_state.logs.append("Big cycle animation stopped due to user request.")
-            return False
         t = step / (steps - 1)
         drop_y = start_drop_y + (end_drop_y - start_drop_y) * t
         lift_y = start_lift_y + (end_lift_y - start_lift_y) * t
-        moving_blocks = [
+        drop_phase.append([
             ("BIG", "#805ad5", drop_y, 160, "Dropping"),
             ("STORAGE", "#dd6b20", lift_y, 80, "Lifting")
-        ]
-        fig = draw_scene(moving_blocks=moving_blocks)
-        placeholder.plotly_chart(fig, use_container_width=True)
-        time.sleep(FRAME_DELAY)
-    st.session_state.logs.append("Completed simultaneous drop 160kg and lift 80kg")
+        ])
+        lift_phase.append([
+            ("BIG", "#805ad5", lift_y, 160, "Lifting")
+        ])
+    return drop_phase, lift_phase
+
+def state_snapshot():
+    """Copy of this session's STATE_FIELDS, so a transition segment keeps the state it was queued with."""
+    return {name: st.session_state[name] for name in STATE_FIELDS}
+
+def hold_frames(seconds):
+    """Frames without moving blocks that keep a client-side transition still for `seconds`."""
+    return [[] for _ in range(round(seconds / FRAME_DELAY))]
+
+def transition_figure(segments):
+    """
+    One figure that plays `segments` in the browser: (state, frames) pairs,
+    where frames are lists of moving_blocks drawn over the scene of `state`.
+    Only scene_base() is layout. The block stacks and status labels are
+    traces that change at the first frame of each segment, and each moving
+    block is a filled scatter trace plus a text trace that change every frame.
+    """
+    base = scene_base()
+    fig = dict(data=[], layout=dict(base["layout"], shapes=base["under"] + base["over"], annotations=base["annotations"]))
+    segments = [(state, frames) for state, frames in segments if frames]
+    frames = [moving_blocks for _, segment_frames in segments for moving_blocks in segment_frames]
+    slots = max((len(moving_blocks) for moving_blocks in frames), default=0)
+
+    def state_traces(state):
+        traces = []
+        for x0, x1, spans, color in stack_columns(state):
+            # One filled polygon per block, separated by gaps
+            xs, ys = [], []
+            for y0, y1 in spans:
+                xs += [x0, x1, x1, x0, x0, None]
+                ys += [y0, y0, y1, y1, y0, None]
+            traces.append(dict(x=xs, y=ys, fillcolor=color))
+        labels = scene_patch(state)[1][-4:]
+        traces.append(dict(
+            x=[label["x"] for label in labels],
+            y=[label["y"] for label in labels],
+            text=[label["text"] for label in labels],
+            textfont=dict(color=[label.get("font", {}).get("color", "#444") for label in labels]),
+        ))
+        return traces
+
+    def slot_traces(moving_blocks):
+        traces = []
+        for i in range(slots):
+            if i < len(moving_blocks) and moving_blocks[i][3] > 0:
+                pt, color, y, size_kg, label = moving_blocks[i]
+                x0, x1 = moving_block_x(pt)
+                traces.append(dict(x=[x0, x1, x1, x0, x0], y=[y, y, y + 3, y + 3, y], fillcolor=color))
+                traces.append(dict(x=[(x0 + x1) / 2], y=[y + 1.2], text=[f"{label}: {size_kg}kg"]))
+            else:
+                traces.append(dict(x=[], y=[]))
+                traces.append(dict(x=[], y=[], text=[]))
+        return traces
+
+    block_style = dict(type="scatter", mode="lines", fill="toself", line=dict(color="black", width=1), hoverinfo="skip", showlegend=False)
+    label_style = dict(type="scatter", mode="text", hoverinfo="skip", showlegend=False)
+    first_state = segments[0][0] if segments else st.session_state
+    *stack_traces, status_trace = state_traces(first_state)
+    fig["data"] = [{**block_style, **trace} for trace in stack_traces] + [{**label_style, **status_trace}] + [
+        {**(block_style if i % 2 == 0 else label_style), **trace}
+        for i, trace in enumerate(slot_traces(frames[0] if frames else []))
+    ]
+    state_ids = list(range(len(stack_traces) + 1))
+    moving_ids = list(range(len(state_ids), len(state_ids) + 2 * slots))
+    fig["frames"] = []
+    shown = first_state
+    for state, segment_frames in segments:
+        for i, moving_blocks in enumerate(segment_frames):
+            if i == 0 and state != shown:
+                # Redraw the stacks and labels along with the first frame of a segment whose state differs
+                frame = dict(data=state_traces(state) + slot_traces(moving_blocks), traces=state_ids + moving_ids)
+                shown = state
+            else:
+                frame = dict(data=slot_traces(moving_blocks), traces=moving_ids)
+            fig["frames"].append(dict(frame, name=str(len(fig["frames"]))))
+    return fig
+
+def play_transition(placeholder, segments):
+    """Send the whole transition to the browser once and let Plotly play it there."""
+    with instruments.phase("client_transition"):
+        html = pio.to_html(
+            transition_figure(segments),
+            validate=False,
+            include_plotlyjs="cdn",
+            full_html=False,
+            auto_play=True,
+            animation_opts=dict(frame=dict(duration=FRAME_DELAY * 1000, redraw=False), transition=dict(duration=0)),
+        )
+        with placeholder:
+            components.html(html, height=620)
+
+def animate_seesaw(placeholder, drop_side, drop_color, lift_side, lift_color, drop_size=20, lift_size=10, steps=50, transition=None):
+    """
+    Play a small drop on the server, or append it to `transition` for client-side
+    playback as a segment over the current (pre-drop) state.
+    """
+    frames = seesaw_frames(drop_side, drop_color, lift_side, lift_color, drop_size, lift_size, steps)
+    if transition is not None:
+        transition.append((state_snapshot(), frames))
+    else:
+        for moving_blocks in frames:
+            if st.session_state.stop_requested:
+                st.session_state.logs.message("Animation stopped due to user request.", st.session_state)
+                return False
+            show_scene(placeholder, moving_blocks=moving_blocks)
+            pause(FRAME_DELAY)
+    st.session_state.logs.message(f"Completed animation: Dropped {drop_size}kg from {drop_side}, Lifted {lift_size}kg to {lift_side}", st.session_state)
+    return True
+
+def animate_big_cycle(placeholder, steps=60, transition=None):
+    """
+    Play the big cycle on the server, or append it to `transition` for client-side
+    playback as segments over the current (pre-cycle) state.
+    """
+    drop_phase, lift_phase = big_cycle_frames(steps)
+    if transition is not None:
+        state = state_snapshot()
+        transition.append((state, drop_phase))
+        st.session_state.logs.message("Completed simultaneous drop 160kg and lift 80kg", st.session_state)
+        transition.append((state, hold_frames(0.4)))
+        transition.append((state, lift_phase))
+        st.session_state.logs.message("Completed lift 160kg back up", st.session_state)
+        return True
+
+    # First, simultaneous drop 160kg and lift 80kg
+    for moving_blocks in drop_phase:
+        if st.session_state.stop_requested:
+            st.session_state.logs.message("Big cycle animation stopped due to user request.", st.session_state)
+            return False
+        show_scene(placeholder, moving_blocks=moving_blocks)
+        pause(FRAME_DELAY)
+    st.session_state.logs.message("Completed simultaneous drop 160kg and lift 80kg", st.session_state)
 
     # Pause briefly
-    time.sleep(0.4)
+    pause(0.4)
 
     # Then, lift 160kg back up
-    start_lift_y = -50
-    end_lift_y = 50
-    for step in range(steps):
+    for moving_blocks in lift_phase:
         if st.session_state.stop_requested:
-            st.session_state.logs.append("Big cycle animation stopped due to user request.")
+            st.session_state.logs.message("Big cycle animation stopped due to user request.", st.session_state)
             return False
-        t = step / (steps - 1)
-        lift_y = start_lift_y + (end_lift_y - start_lift_y) * t
-        moving_blocks = [
-            ("BIG", "#805ad5", lift_y, 160, "Lifting")
-        ]
-        fig = draw_scene(moving_blocks=moving_blocks)
-        placeholder.plotly_chart(fig, use_container_width=True)
-        time.sleep(FRAME_DELAY)
-    st.session_state.logs.append("Completed lift 160kg back up")
+        show_scene(placeholder, moving_blocks=moving_blocks)
+        pause(FRAME_DELAY)
+    st.session_state.logs.message("Completed lift 160kg back up", st.session_state)
     return True
 
+# ---------- BACKGROUND SIMULATION ----------
+def sync_from_runner(runner=None):
+    """Copy a runner's latest snapshot (by default this session's background runner) into the session state."""
+    snapshot = (runner or st.session_state.runner).latest()
+    st.session_state.update({name: snapshot[name] for name in STATE_FIELDS})
+
+def record_telemetry(sim, result):
+    if st.session_state.telemetry is not None:
+        st.session_state.telemetry.record(sim, result)
+
+def start_telemetry():
+    if TELEMETRY_DIR is not None and st.session_state.telemetry is None:
+        # Timestamped for sorting, with a unique suffix so runs started in the same second never share a directory
+        os.makedirs(TELEMETRY_DIR, exist_ok=True)
+        run_dir = tempfile.mkdtemp(prefix=time.strftime("run-%Y%m%d-%H%M%S-"), dir=TELEMETRY_DIR)
+        st.session_state.telemetry = TelemetrySink(run_dir, chunk_size=4096, flush_interval=TELEMETRY_FLUSH_EVERY)
+
+def close_telemetry():
+    if st.session_state.telemetry is not None:
+        st.session_state.telemetry.close()
+        st.session_state.telemetry = None
+
+def autosave_checkpoint(force=False):
+    """Save to CHECKPOINT_PATH every CHECKPOINT_EVERY steps (last writer wins across sessions)."""
+    if CHECKPOINT_PATH is None:
+        return
+    if force or st.session_state.step_count - st.session_state.checkpoint_step >= CHECKPOINT_EVERY:
+        checkpoint.save(GravityBatterySimulator.from_state(st.session_state), CHECKPOINT_PATH)
+        st.session_state.checkpoint_step = st.session_state.step_count
+
+def checkpoint_saver(sim):
+    """Runner subscriber that saves `sim` to CHECKPOINT_PATH every CHECKPOINT_EVERY steps (runs on the loop thread)."""
+    def save(snapshot):
+        if snapshot["step_count"] % CHECKPOINT_EVERY == 0:
+            checkpoint.save(sim, CHECKPOINT_PATH)
+    return save
+
+def stop_runner():
+    if st.session_state.runner is not None:
+        st.session_state.runner.stop()
+        sync_from_runner()
+        st.session_state.runner = None
+
+def get_shared_runner(name):
+    """The single runner of SHARED_SCENARIOS[name] in this process, started by its first viewer."""
+    return shared_runner(name, lambda: GravityBatterySimulator(**SHARED_SCENARIOS[name]),
+                         tick=SIM_TICK, idle_timeout=RUNNER_IDLE_TIMEOUT)
+
+@st.fragment(run_every=UI_POLL)
+def live_view(shared_name=None):
+    """
+    Scene and headline numbers from a runner's latest snapshot, refreshed on their own timer.
+    Shows this session's background runner, or the shared scenario `shared_name` if given;
+    a shared snapshot is only drawn, never copied into this session's own state.
+    """
+    runner = st.session_state.runner if shared_name is None else get_shared_runner(shared_name)
+    if runner is None:
+        return
+    runner.touch()
+    if runner.error is not None:
+        st.error(f"Background simulation stopped: {runner.error!r}")
+    elif not runner.running:
+        # Stopped itself after RUNNER_IDLE_TIMEOUT without a refresh (e.g. a throttled background tab)
+        runner.start()
+    snapshot = runner.latest()
+    if shared_name is None:
+        sync_from_runner(runner)
+    show_scene(st.empty(), state=snapshot)
+    st.caption(
+        f"Step {snapshot['step_count']} · B1 {snapshot['battery1']:.0f}% · "
+        f"B2 {snapshot['battery2']:.0f}% · {runner.steps_per_second:.1f} steps/s"
+        + (f" · shared scenario “{shared_name}”" if shared_name is not None else "")
+    )
+
+# ---------- TOWER ARRAY ----------
+def get_towers(n_towers, big_cycle):
+    """
+    The session's tower array, every tower starting from the session's top A/B stacks.
+    Rebuilt when the tower count, trigger mode or those stacks change.
+    """
+    source = (n_towers, big_cycle, st.session_state.blocks_top_A, st.session_state.blocks_top_B)
+    if st.session_state.towers is None or st.session_state.towers_from != source:
+        st.session_state.towers = TowerArray(n_towers, source[2], source[3], big_cycle=big_cycle)
+        st.session_state.towers_from = source
+    return st.session_state.towers
+
 # ---------- MAIN UI ----------
 st.title("⚡ Gravity Battery — Seesaw Continuous Simulation")
 
@@ -199,16 +534,54 @@ left_col, mid_col, right_col = st.columns([1, 2, 1])
 
 with left_col:
     st.subheader("Controls")
+    if st.session_state.runner is not None:
+        sync_from_runner()
     if st.button("Start"):
+        stop_runner()
         st.session_state.running = True
         st.session_state.stop_requested = False
-        st.session_state.logs = []
+        st.session_state.logs.clear()
         st.session_state.step_count = 0
-        st.session_state.logs.append("Simulation started.")
+        st.session_state.checkpoint_step = 0
+        st.session_state.towers = None
+        st.session_state.logs.message("Simulation started.", st.session_state)
+        close_telemetry()
+        start_telemetry()
     if st.button("Stop"):
+        stop_runner()
         st.session_state.stop_requested = True
         st.session_state.running = False
-        st.session_state.logs.append("Simulation stopped.")
+        st.session_state.logs.message("Simulation stopped.", st.session_state)
+        st.session_state.logs.flush()
+        close_telemetry()
+        if not st.session_state.tower_mode:  # the tower array is not a single pair and is never checkpointed
+            autosave_checkpoint(force=True)
+    if st.button("Resume", help="Continue from the current state (e.g. a loaded checkpoint) without resetting the step count."):
+        st.session_state.running = True
+        st.session_state.stop_requested = False
+        st.session_state.logs.message(f"Simulation resumed at step {st.session_state.step_count}.", st.session_state)
+        start_telemetry()
+    st.checkbox("Client-side animation", key="client_animation",
+                help="Send each transition to the browser once and play it there instead of redrawing every frame from the server.")
+    st.checkbox("Background simulation", key="background_sim",
+                help="Step the simulation in a background task at its own tick rate; the view only polls its latest state.")
+    turbo = st.checkbox("Turbo", key="turbo",
+                        help="Advance many steps per rendered frame without animations; only the latest state is drawn.")
+    if turbo:
+        turbo_steps = st.number_input("Turbo steps per frame", min_value=1, value=1000, step=100)
+        turbo_budget_ms = st.number_input("Turbo time budget per frame (ms, 0 = none)", min_value=0, value=0, step=50)
+    shared = st.checkbox("Watch shared simulation", key="shared_view",
+                         help="Watch a simulation that runs once on the server for every viewer (read-only); your own run is paused.")
+    if shared:
+        shared_name = st.selectbox("Shared scenario", list(SHARED_SCENARIOS), key="shared_scenario")
+    tower_mode = st.checkbox("Tower array", key="tower_mode",
+                             help="Step many towers, all starting from the top A/B stacks below, feeding shared B1/B2 banks at once; the scene shows one selected tower.")
+    if tower_mode:
+        n_towers = st.number_input("Towers", min_value=1, max_value=100_000, value=1000, step=100)
+        tower_big_cycle = st.radio("Big cycle trigger", BIG_CYCLE_MODES, horizontal=True,
+                                   format_func={"tower": "Per tower", "pooled": "Pooled"}.get)
+        tower_steps = st.number_input("Tower steps per frame", min_value=1, value=10, step=10)
+        selected_tower = st.number_input("Show tower", min_value=0, max_value=n_towers - 1, value=0, step=1)
 
     st.write("Initial top stacks (editable, max 200kg total):")
     blocks_a = st.number_input("Blocks at top A (10kg each)", min_value=0, max_value=MAX_TOTAL_BLOCKS, value=st.session_state.blocks_top_A, step=1)
@@ -219,37 +592,171 @@ with left_col:
     else:
         st.error(f"Total blocks (A + B) must not exceed {MAX_TOTAL_BLOCKS} (200kg).")
 
+    with st.expander("Checkpoint"):
+        st.download_button(
+            "Download checkpoint",
+            data=checkpoint.dumps(GravityBatterySimulator.from_state(st.session_state)),
+            file_name=f"gravity-battery-step{st.session_state.step_count}.gbck",
+            mime="application/octet-stream",
+        )
+        uploaded = st.file_uploader("Checkpoint file", type=["gbck"])
+        replay_to = st.number_input("Replay to step (0 = the checkpoint's step)", min_value=0, value=0, step=1000)
+        if uploaded is not None and st.button("Load checkpoint"):
+            try:
+                loaded = checkpoint.loads(uploaded.getvalue())
+                checkpoint_state(loaded)
+                saved_step = loaded.step_count
+                started = time.perf_counter()
+                checkpoint.replay(loaded, replay_to or saved_step)
+                stop_runner()
+                st.session_state.update(checkpoint_state(loaded))
+                st.session_state.checkpoint_step = loaded.step_count
+                st.session_state.running = False
+                st.session_state.stop_requested = False
+                st.session_state.logs.message(
+                    f"Loaded checkpoint at step {saved_step}, replayed to step {loaded.step_count} "
+                    f"in {time.perf_counter() - started:.2f}s. Press Resume to continue.",
+                    st.session_state,
+                )
+                rerun()
+            except ValueError as e:
+                st.error(str(e))
+
 with mid_col:
     scene_ph = st.empty()
 
+# What the scene and status show (read-only unless it is this session's own run)
+if shared:
+    view = get_shared_runner(shared_name).latest()
+elif tower_mode:
+    view = get_towers(n_towers, tower_big_cycle).tower_state(selected_tower)
+else:
+    view = st.session_state
+
 with right_col:
     st.subheader("Status")
-    total_storage = st.session_state.storage_left + st.session_state.storage_right
-    total_mass = (st.session_state.blocks_top_A + st.session_state.blocks_top_B +
-                  st.session_state.tied_bottom_C + st.session_state.tied_bottom_D +
-                  st.session_state.storage_left // 10 + st.session_state.storage_right // 10) * 10
-    st.write(f"Step: {st.session_state.step_count}")
-    st.write(f"Top A: {st.session_state.blocks_top_A * 10} kg")
-    st.write(f"Top B: {st.session_state.blocks_top_B * 10} kg")
-    st.write(f"Tied at C: {st.session_state.tied_bottom_C * 10} kg")
-    st.write(f"Tied at D: {st.session_state.tied_bottom_D * 10} kg")
-    st.write(f"Storage left (C): {st.session_state.storage_left} kg")
-    st.write(f"Storage right (D): {st.session_state.storage_right} kg")
+    if tower_mode and st.session_state.towers is not None:
+        totals = st.session_state.towers.totals()
+        st.write(f"Towers: {totals['towers']:,} (showing tower {selected_tower})")
+        st.write(f"Dropped last step: {totals['dropped_last_step']:,} towers")
+        st.write(f"Blocks on top: {totals['blocks_top'] * 10:,} kg | Tied: {totals['blocks_tied'] * 10:,} kg")
+        st.write(f"Storage, all towers: {totals['storage_kg']:,} kg")
+        st.write(f"Drops: {totals['drops']:,} | Big cycles: {totals['big_cycles']:,}")
+        st.caption(f"Tower {selected_tower}, with the shared banks:")
+    total_storage = view["storage_left"] + view["storage_right"]
+    total_mass = (view["blocks_top_A"] + view["blocks_top_B"] +
+                  view["tied_bottom_C"] + view["tied_bottom_D"] +
+                  view["storage_left"] // 10 + view["storage_right"] // 10) * 10
+    st.write(f"Step: {view['step_count']}")
+    st.write(f"Top A: {view['blocks_top_A'] * 10} kg")
+    st.write(f"Top B: {view['blocks_top_B'] * 10} kg")
+    st.write(f"Tied at C: {view['tied_bottom_C'] * 10} kg")
+    st.write(f"Tied at D: {view['tied_bottom_D'] * 10} kg")
+    st.write(f"Storage left (C): {view['storage_left']} kg")
+    st.write(f"Storage right (D): {view['storage_right']} kg")
     st.write(f"Total storage: {total_storage} kg")
     st.write(f"Total mass: {total_mass} kg")
-    st.write(f"Battery B1: {st.session_state.battery1:.0f}%")
-    st.write(f"Battery B2: {st.session_state.battery2:.0f}%")
-    st.write(f"Generator angle: {st.session_state.generator_angle:.0f}°")
-    if st.session_state.houses_lit:
+    st.write(f"Battery B1: {view['battery1']:.0f}%")
+    st.write(f"Battery B2: {view['battery2']:.0f}%")
+    st.write(f"Generator angle: {view['generator_angle']:.0f}°")
+    if st.session_state.turbo and st.session_state.turbo_rate is not None:
+        st.write(f"Turbo speed: {st.session_state.turbo_rate:,.0f} steps/s")
+    if view["houses_lit"]:
         st.success("Houses are lit by B1!")
     else:
         st.info("Houses are not lit yet")
 
-# Render initial scene
-scene_ph.plotly_chart(draw_scene(), use_container_width=True)
+    if INSTRUMENTATION:
+        with st.expander("Profiling", expanded=False):
+            st.caption(f"Rolling p50/p99 over the last {instruments.window} samples per phase, all sessions of this process.")
+            st.dataframe(
+                [
+                    {"phase": name, "calls": stats.calls, "p50 (ms)": stats.p50 * 1000,
+                     "p99 (ms)": stats.p99 * 1000, "total (s)": stats.total_seconds}
+                    for name, stats in instruments.snapshot().items()
+                ],
+                hide_index=True,
+            )
+            st.write(instruments.counters())
+
+if not shared and not tower_mode and st.session_state.runner is None:
+    # A background runner autosaves by itself (see checkpoint_saver)
+    autosave_checkpoint()
+
+# ---------- SHARED / BACKGROUND SIMULATION ----------
+if shared:
+    # Only snapshots of the shared runner are read here; nothing steps in this session
+    stop_runner()
+    with mid_col:
+        live_view(shared_name)
+elif st.session_state.background_sim and st.session_state.running and not st.session_state.stop_requested and not tower_mode:
+    if st.session_state.runner is None:
+        sim = GravityBatterySimulator.from_state(st.session_state)
+        runner = SimulationRunner(sim, tick=SIM_TICK, idle_timeout=RUNNER_IDLE_TIMEOUT)
+        telemetry = st.session_state.telemetry
+        if telemetry is not None:
+            runner.subscribe(lambda snapshot: telemetry.record(runner.sim, snapshot["last_step"]))
+        if CHECKPOINT_PATH is not None:
+            # Fragment reruns never reach autosave_checkpoint(), so the runner saves for itself
+            runner.subscribe(checkpoint_saver(runner.sim))
+        st.session_state.runner = runner.start()
+        st.session_state.logs.message(f"Background simulation running at {1 / SIM_TICK:g} steps/s.", st.session_state)
+    with mid_col:
+        live_view()
+else:
+    # Background mode switched off while running
+    stop_runner()
+    # Render initial scene
+    show_scene(scene_ph, state=view)
+
+# ---------- TOWER ARRAY STEP ----------
+if st.session_state.running and not st.session_state.stop_requested and tower_mode and not shared:
+    towers = get_towers(n_towers, tower_big_cycle)
+    big_cycles = towers.total_big_cycles
+    with instruments.phase("tower_steps"):
+        towers.run(tower_steps)
+    instruments.count("steps", tower_steps)
+    st.session_state.logs.message(
+        f"Towers: step {towers.step_count}, {towers.last_step.drops} of {towers.n_towers} towers dropped, "
+        f"{towers.total_big_cycles - big_cycles} big cycles. B1: {towers.battery1:.0f}% | B2: {towers.battery2:.1f}%",
+        towers.tower_state(selected_tower),
+    )
+    rerun()
+
+# ---------- TURBO STEP ----------
+if st.session_state.running and not st.session_state.stop_requested and not st.session_state.background_sim and turbo and not shared and not tower_mode:
+    sim = GravityBatterySimulator.from_state(st.session_state)
+    counts = {"big_cycle": 0, "no_drop": 0}
+
+    def track(result):
+        counts["big_cycle"] += result.big_cycle
+        counts["no_drop"] += result.side is None
+        record_telemetry(sim, result)
+
+    started = time.perf_counter()
+    done = 0
+    while done < turbo_steps:
+        chunk = min(TURBO_CHUNK, turbo_steps - done)
+        with instruments.phase("turbo_chunk"):
+            sim.run(chunk, callback=track)
+        done += chunk
+        if turbo_budget_ms and (time.perf_counter() - started) * 1000 >= turbo_budget_ms:
+            break
+    elapsed = time.perf_counter() - started
+    st.session_state.update(sim.to_state())
+    st.session_state.turbo_rate = done / elapsed if elapsed > 0 else None
+    instruments.count("steps", done)
+    st.session_state.logs.message(
+        f"Turbo: advanced {done} steps to step {sim.step_count} ({counts['big_cycle']} big cycles). "
+        f"B1: {sim.battery1:.0f}% | B2: {sim.battery2:.1f}%",
+        st.session_state,
+    )
+    if counts["no_drop"]:
+        st.session_state.logs.message("No drop condition met, checking again...", st.session_state)
+    rerun()
 
 # ---------- SIMULATION STEP ----------
-if st.session_state.running and not st.session_state.stop_requested:
+if st.session_state.running and not st.session_state.stop_requested and not st.session_state.background_sim and not turbo and not shared and not tower_mode:
     dropped = False
     side = None
     opposite = None
@@ -258,144 +765,96 @@ if st.session_state.running and not st.session_state.stop_requested:
     lifted = 0
 
     # Log state
-    total_storage = st.session_state.storage_left + st.session_state.storage_right
     st.session_state.step_count += 1
-    state_log = (
-        f"--- Step {st.session_state.step_count - 1} ---\n"
-        f"Top A: {st.session_state.blocks_top_A * 10}kg | Top B: {st.session_state.blocks_top_B * 10}kg\n"
-        f"Tied C: {st.session_state.tied_bottom_C * 10}kg | Tied D: {st.session_state.tied_bottom_D * 10}kg\n"
-        f"Storage L: {st.session_state.storage_left}kg | Storage R: {st.session_state.storage_right}kg | Total: {total_storage}kg\n"
-        f"B1: {st.session_state.battery1}% | B2: {st.session_state.battery2}% | Gen: {st.session_state.generator_angle}°\n"
-        f"Houses: {'lit' if st.session_state.houses_lit else 'dark'}"
-    )
-    st.session_state.logs.append(state_log)
-    st.session_state.logs = st.session_state.logs[-100:]  # Limit to last 100 entries
+    instruments.count("steps")
+    st.session_state.logs.record("state", st.session_state, step=st.session_state.step_count - 1)
 
     left_color = "#2b6cb0"
     right_color = "#c53030"
+    sim = GravityBatterySimulator.from_state(st.session_state)
+    client_side = st.session_state.client_animation
+    transition = [] if client_side else None  # (state, frames) segments, see transition_figure
 
     # Check for drops
     try:
-        if st.session_state.blocks_top_A == 2 and st.session_state.blocks_top_B < 2:
-            lifted = st.session_state.tied_bottom_D
-            ok = animate_seesaw(scene_ph, "left", left_color, "right", right_color, drop_size=20, lift_size=10 if lifted > 0 else 0)
-            if not ok:
-                st.session_state.stop_requested = True
-            st.session_state.blocks_top_A = 0
-            st.session_state.storage_left += 10
-            st.session_state.tied_bottom_C += 1
-            st.session_state.tied_bottom_D = 0
-            st.session_state.blocks_top_B += lifted
-            side, opposite, drop_color, lift_color = "left", "right", left_color, right_color
-            dropped = True
-        elif st.session_state.blocks_top_B == 2 and st.session_state.blocks_top_A < 2:
-            lifted = st.session_state.tied_bottom_C
-            ok = animate_seesaw(scene_ph, "right", right_color, "left", left_color, drop_size=20, lift_size=10 if lifted > 0 else 0)
+        with instruments.phase("drop_rules"):
+            side = sim.drop_side()
+            if side is not None:
+                lifted = sim.lift_count(side)
+        if side is not None:
+            if side == "left":
+                opposite, drop_color, lift_color = "right", left_color, right_color
+            else:
+                opposite, drop_color, lift_color = "left", right_color, left_color
+            ok = animate_seesaw(scene_ph, side, drop_color, opposite, lift_color, drop_size=20, lift_size=10 if lifted > 0 else 0, transition=transition)
             if not ok:
                 st.session_state.stop_requested = True
-            st.session_state.blocks_top_B = 0
-            st.session_state.storage_right += 10
-            st.session_state.tied_bottom_D += 1
-            st.session_state.tied_bottom_C = 0
-            st.session_state.blocks_top_A += lifted
-            side, opposite, drop_color, lift_color = "right", "left", right_color, left_color
-            dropped = True
-        elif st.session_state.blocks_top_A == 2 and st.session_state.blocks_top_B == 2:
-            # Alternate drops when both sides have 2 blocks
-            if st.session_state.step_count % 2 == 0:
-                lifted = st.session_state.tied_bottom_D
-                ok = animate_seesaw(scene_ph, "left", left_color, "right", right_color, drop_size=20, lift_size=10 if lifted > 0 else 0)
-                if not ok:
-                    st.session_state.stop_requested = True
-                st.session_state.blocks_top_A = 0
-                st.session_state.storage_left += 10
-                st.session_state.tied_bottom_C += 1
-                st.session_state.tied_bottom_D = 0
-                st.session_state.blocks_top_B += lifted
-                side, opposite, drop_color, lift_color = "left", "right", left_color, right_color
-            else:
-                lifted = st.session_state.tied_bottom_C
-                ok = animate_seesaw(scene_ph, "right", right_color, "left", left_color, drop_size=20, lift_size=10 if lifted > 0 else 0)
-                if not ok:
-                    st.session_state.stop_requested = True
-                st.session_state.blocks_top_B = 0
-                st.session_state.storage_right += 10
-                st.session_state.tied_bottom_D += 1
-                st.session_state.tied_bottom_C = 0
-                st.session_state.blocks_top_A += lifted
-                side, opposite, drop_color, lift_color = "right", "left", right_color, left_color
+            with instruments.phase("energy"):
+                sim.apply_drop(side)
+                st.session_state.update(sim.to_state())
+            instruments.count("drops")
             dropped = True
 
         if not dropped:
-            st.session_state.logs.append("No drop condition met, checking again...")
-            time.sleep(0.2)
-            st.rerun()
+            record_telemetry(sim, StepResult(sim.step_count, None, 0, False))
+            st.session_state.logs.message("No drop condition met, checking again...", st.session_state)
+            pause(0.2)
+            rerun()
 
-        # Generate power for small drop (20kg)
+        # Log drop event
         if dropped:
-            energy_joules = 20 * GRAVITY * HEIGHT  # 19,620 J
-            st.session_state.battery1 = min(st.session_state.battery1 + (energy_joules / B1_CAPACITY) * 100, 100)
-            st.session_state.generator_angle += (energy_joules / B1_CAPACITY) * 360  # Proportional rotation
-            st.session_state.houses_lit = st.session_state.battery1 >= 10
-
-            # Log drop event
-            lift_to = "B" if opposite == "right" else "A"
-            drop_to = "C" if side == "left" else "D"
-            st.session_state.logs.append(
-                f"Action: Dropped 20kg from {side.upper()} to {drop_to}, stored 10kg, tied 10kg. "
-                f"Lifted {lifted * 10}kg to {lift_to}. B1 +{(energy_joules / B1_CAPACITY) * 100:.1f}%, Generator +{(energy_joules / B1_CAPACITY) * 360:.0f}°."
-            )
-            # Add 10kg to opposite side
-            if opposite == "left":
-                st.session_state.blocks_top_A += 1
-                add_side = "A"
-            else:
-                st.session_state.blocks_top_B += 1
-                add_side = "B"
-            st.session_state.logs.append(f"Action: Added 10kg to {add_side}.")
-            st.session_state.logs = st.session_state.logs[-100:]
+            st.session_state.logs.record("drop", st.session_state, side=side, mass_kg=lifted * 10, energy=sim.config.drop_energy)
 
         # Update scene after drop
-        scene_ph.plotly_chart(draw_scene(), use_container_width=True)
-        time.sleep(0.4)
+        if client_side:
+            transition.append((state_snapshot(), hold_frames(0.4)))
+        else:
+            show_scene(scene_ph)
+            pause(0.4)
 
         # Check for STORAGE threshold -> trigger BIG CYCLE
         total_storage = st.session_state.storage_left + st.session_state.storage_right
-        if total_storage >= STORAGE_THRESHOLD:
-            st.session_state.logs.append(f"Action: Big cycle triggered (Storage = {total_storage}kg). Dropping 160kg...")
-            ok = animate_big_cycle(scene_ph, steps=60)
+        with instruments.phase("drop_rules"):
+            big_cycle = sim.big_cycle_due()
+        if big_cycle:
+            st.session_state.logs.record("big_cycle_start", st.session_state, mass_kg=total_storage)
+            ok = animate_big_cycle(scene_ph, steps=60, transition=transition)
             if not ok:
                 st.session_state.stop_requested = True
-            energy_joules = 160 * GRAVITY * HEIGHT  # 156,960 J
-            st.session_state.generator_angle += (energy_joules / B2_CAPACITY) * 360
-            st.session_state.battery2 = min(st.session_state.battery2 + (energy_joules / B2_CAPACITY) * 100, 100)
-            st.session_state.storage_left = 0
-            st.session_state.storage_right = 0
-            st.session_state.battery2 = max(st.session_state.battery2 - (80_000 / B2_CAPACITY) * 100, 0)  # Assume 80 kJ to lift
-            total_storage = st.session_state.storage_left + st.session_state.storage_right
-            st.session_state.logs.append(
-                f"--- Step {st.session_state.step_count} ---\n"
-                f"Top A: {st.session_state.blocks_top_A * 10}kg | Top B: {st.session_state.blocks_top_B * 10}kg\n"
-                f"Tied C: {st.session_state.tied_bottom_C * 10}kg | Tied D: {st.session_state.tied_bottom_D * 10}kg\n"
-                f"Storage L: {st.session_state.storage_left}kg | Storage R: {st.session_state.storage_right}kg | Total: {total_storage}kg\n"
-                f"B1: {st.session_state.battery1}% | B2: {st.session_state.battery2}% | Gen: {st.session_state.generator_angle}°\n"
-                f"Houses: {'lit' if st.session_state.houses_lit else 'dark'}\n"
-                f"Action: Big cycle: Dropped 160kg, B2 +{(energy_joules / B2_CAPACITY) * 100:.1f}%, "
-                f"Gen +{(energy_joules / B2_CAPACITY) * 360:.0f}°. Reset storages. Used {(80_000 / B2_CAPACITY) * 100:.1f}% B2 to lift 160kg."
-            )
-            st.session_state.logs = st.session_state.logs[-100:]
-            st.session_state.houses_lit = st.session_state.battery1 >= 10
-            scene_ph.plotly_chart(draw_scene(), use_container_width=True)
-            time.sleep(0.6)
-
-        # Rerun to update UI with new values
-        st.rerun()
+            with instruments.phase("energy"):
+                sim.apply_big_cycle()
+                st.session_state.update(sim.to_state())
+            instruments.count("big_cycles")
+            st.session_state.logs.record("big_cycle", st.session_state, energy=sim.config.big_cycle_energy)
+            if client_side:
+                transition.append((state_snapshot(), hold_frames(0.6)))
+            else:
+                show_scene(scene_ph)
+                pause(0.6)
+        record_telemetry(sim, StepResult(sim.step_count, side, lifted, big_cycle))
+
+        if client_side:
+            # The browser plays the transition; advance_after_playback() starts the next step
+            play_transition(scene_ph, transition)
+            st.session_state.next_step_at = time.time() + sum(len(frames) for _, frames in transition) * FRAME_DELAY
+        else:
+            # Rerun to update UI with new values
+            rerun()
 
     except Exception as e:
-        st.session_state.logs.append(f"Error in simulation step: {str(e)}")
+        st.session_state.logs.message(f"Error in simulation step: {str(e)}", st.session_state)
         st.session_state.stop_requested = True
-        st.rerun()
+        rerun()
 
 # Event Log display
 st.subheader("Simulation Steps & Events")
-st.text_area("Simulation Log", value="\n".join(st.session_state.logs), height=300, disabled=True)
+st.text_area("Simulation Log", value=st.session_state.logs.text(last=LOG_WINDOW), height=300, disabled=True)
+
+# ---------- CLIENT-SIDE PLAYBACK ----------
+if st.session_state.running and st.session_state.client_animation and not st.session_state.background_sim and not turbo and not shared and not tower_mode:
+    @st.fragment(run_every=CLIENT_TICK)
+    def advance_after_playback():
+        if time.time() >= st.session_state.next_step_at:
+            rerun()
+
+    advance_after_playback()
@@ -0,0 +1,172 @@
+"""
+Vectorized NumPy batch runner for parameter sweeps.
+
+Steps thousands of independent seesaw configurations at once. Each state
+counter of GravityBatterySimulator becomes an array with one entry per
+configuration and the branches of the drop rules become boolean masks, so a
+step costs a handful of array operations regardless of the batch size.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from simulator import (
+    B1_CAPACITY, B2_CAPACITY, BIG_DROP_KG, BIG_LIFT_JOULES, BLOCK_KG, DROP_KG,
+    GRAVITY, HEIGHT, INITIAL_STATE, MAX_TOTAL_BLOCKS, STORAGE_THRESHOLD,
+)
+
+# Parameters that may vary per configuration, with their scalar defaults
+SWEEP_PARAMS = {
+    "gravity": GRAVITY,
+    "height": HEIGHT,
+    "b1_capacity": B1_CAPACITY,
+    "b2_capacity": B2_CAPACITY,
+    "storage_threshold": STORAGE_THRESHOLD,
+    "max_total_blocks": MAX_TOTAL_BLOCKS,
+    "blocks_top_A": INITIAL_STATE["blocks_top_A"],
+    "blocks_top_B": INITIAL_STATE["blocks_top_B"],
+}
+
+# Time series arrays have shape (len(steps), n_configs)
+BatchHistory = namedtuple("BatchHistory", ["steps", "battery1", "battery2", "generator_angle", "houses_lit"])
+
+
+def config_grid(**axes):
+    """
+    Cartesian product of the given parameter axes, flattened to 1-D arrays.
+
+    config_grid(height=[50, 100], blocks_top_A=range(4)) returns a dict with
+    8 entries per key, ready to be passed to BatchSimulator(**grid).
+    """
+    unknown = set(axes) - set(SWEEP_PARAMS)
+    if unknown:
+        raise TypeError(f"Unknown sweep parameters: {', '.join(sorted(unknown))}")
+    names = list(axes)
+    mesh = np.meshgrid(*(np.asarray(list(axes[name])) for name in names), indexing="ij")
+    return {name: values.ravel() for name, values in zip(names, mesh)}
+
+
+def drop_masks(blocks_top_A, blocks_top_B, step_count, valid):
+    """Masks of the entries that drop left / right at step_count (GravityBatterySimulator.drop_side() per entry)."""
+    A, B = blocks_top_A, blocks_top_B
+    # Alternate drops when both sides have 2 blocks
+    if step_count % 2 == 0:
+        left = (A == 2) & (B <= 2) & valid
+        right = (B == 2) & (A < 2) & valid
+    else:
+        left = (A == 2) & (B < 2) & valid
+        right = (B == 2) & (A <= 2) & valid
+    return left, right
+
+
+def move_blocks(sim, left, right):
+    """Apply the block and storage moves of every left/right drop to the counter arrays of `sim`."""
+    lifted_left = np.where(left, sim.tied_bottom_D, 0)
+    lifted_right = np.where(right, sim.tied_bottom_C, 0)
+    # Dropping side empties; opposite top gains the lifted blocks plus 10kg
+    sim.blocks_top_A = np.where(left, 0, sim.blocks_top_A + lifted_right + right)
+    sim.blocks_top_B = np.where(right, 0, sim.blocks_top_B + lifted_left + left)
+    sim.tied_bottom_C = np.where(left, sim.tied_bottom_C + 1, np.where(right, 0, sim.tied_bottom_C))
+    sim.tied_bottom_D = np.where(right, sim.tied_bottom_D + 1, np.where(left, 0, sim.tied_bottom_D))
+    sim.storage_left += BLOCK_KG * left
+    sim.storage_right += BLOCK_KG * right
+
+
+class BatchSimulator:
+    """
+    Array-backed counterpart of GravityBatterySimulator.
+
+    Every keyword of SWEEP_PARAMS accepts a scalar or a 1-D array; scalars are
+    broadcast to the batch size. Configurations whose initial stacks exceed
+    max_total_blocks (the limit the UI enforces) are flagged in `valid` and
+    never stepped.
+    """
+
+    def __init__(self, n_configs=None, **params):
+        unknown = set(params) - set(SWEEP_PARAMS)
+        if unknown:
+            raise TypeError(f"Unknown sweep parameters: {', '.join(sorted(unknown))}")
+        values = {name: np.asarray(params.get(name, default)) for name, default in SWEEP_PARAMS.items()}
+        if n_configs is None:
+            n_configs = max(value.size for value in values.values())
+        shape = (n_configs,)
+        values = {name: np.broadcast_to(value, shape) for name, value in values.items()}
+
+        gravity = values["gravity"].astype(np.float64)
+        height = values["height"].astype(np.float64)
+        b1_capacity = values["b1_capacity"].astype(np.float64)
+        b2_capacity = values["b2_capacity"].astype(np.float64)
+        drop_energy = DROP_KG * gravity * height
+        big_cycle_energy = BIG_DROP_KG * gravity * height
+        # Per-configuration increments, computed in the same order as the scalar simulator
+        self.b1_gain = (drop_energy / b1_capacity) * 100
+        self.drop_angle = (drop_energy / b1_capacity) * 360
+        self.b2_gain = (big_cycle_energy / b2_capacity) * 100
+        self.big_angle = (big_cycle_energy / b2_capacity) * 360
+        self.b2_lift_cost = (BIG_LIFT_JOULES / b2_capacity) * 100
+        self.storage_threshold = values["storage_threshold"].astype(np.int32)
+
+        self.n_configs = n_configs
+        self.blocks_top_A = values["blocks_top_A"].astype(np.int32)
+        self.blocks_top_B = values["blocks_top_B"].astype(np.int32)
+        self.valid = self.blocks_top_A + self.blocks_top_B <= values["max_total_blocks"]
+        self.tied_bottom_C = np.zeros(shape, dtype=np.int32)
+        self.tied_bottom_D = np.zeros(shape, dtype=np.int32)
+        self.storage_left = np.zeros(shape, dtype=np.int32)
+        self.storage_right = np.zeros(shape, dtype=np.int32)
+        self.battery1 = np.zeros(shape, dtype=np.float64)
+        self.battery2 = np.zeros(shape, dtype=np.float64)
+        self.generator_angle = np.zeros(shape, dtype=np.float64)
+        self.houses_lit = np.zeros(shape, dtype=bool)
+        self.step_count = 0
+
+    def step(self):
+        """Advance every valid configuration by one step. Returns the mask of configs that dropped."""
+        self.step_count += 1
+        left, right = drop_masks(self.blocks_top_A, self.blocks_top_B, self.step_count, self.valid)
+        dropped = left | right
+        if not dropped.any():
+            return dropped
+        move_blocks(self, left, right)
+
+        self.battery1 = np.where(dropped, np.minimum(self.battery1 + self.b1_gain, 100), self.battery1)
+        self.generator_angle = np.where(dropped, self.generator_angle + self.drop_angle, self.generator_angle)
+        self.houses_lit = np.where(dropped, self.battery1 >= 10, self.houses_lit)
+
+        big = dropped & (self.storage_left + self.storage_right >= self.storage_threshold)
+        if big.any():
+            self.generator_angle = np.where(big, self.generator_angle + self.big_angle, self.generator_angle)
+            charged = np.minimum(self.battery2 + self.b2_gain, 100)
+            self.battery2 = np.where(big, np.maximum(charged - self.b2_lift_cost, 0), self.battery2)
+            self.storage_left[big] = 0
+            self.storage_right[big] = 0
+        return dropped
+
+    def run(self, n_steps, record_every=1, out=None):
+        """
+        Advance n_steps steps and return a BatchHistory sampled every
+        `record_every` steps (the sample is taken after the step).
+
+        `out` may be a preallocated BatchHistory (e.g. views into a shared
+        buffer) to write the samples into instead of allocating new arrays.
+        """
+        n_samples = n_steps // record_every
+        shape = (n_samples, self.n_configs)
+        history = out if out is not None else BatchHistory(
+            steps=np.empty(n_samples, dtype=np.int64),
+            battery1=np.empty(shape, dtype=np.float64),
+            battery2=np.empty(shape, dtype=np.float64),
+            generator_angle=np.empty(shape, dtype=np.float64),
+            houses_lit=np.empty(shape, dtype=bool),
+        )
+        sample = 0
+        for done in range(1, n_steps + 1):
+            self.step()
+            if done % record_every == 0:
+                history.steps[sample] = self.step_count
+                history.battery1[sample] = self.battery1
+                history.battery2[sample] = self.battery2
+                history.generator_angle[sample] = self.generator_angle
+                history.houses_lit[sample] = self.houses_lit
+                sample += 1
+        return history
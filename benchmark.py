@@ -0,0 +1,288 @@
+"""
+Benchmarks for the simulation and rendering hot paths.
+
+    python benchmark.py                     # run, print JSON, compare with benchmark_baseline.json
+    python benchmark.py --output run.json   # also write the results to a file
+    python benchmark.py --save-baseline     # store the best of 3 runs as the new baseline
+
+Measures headless simulator throughput, draw_scene build time and figure JSON
+size as the stacks grow to MAX_TOTAL_BLOCKS, the cost of one animate_seesaw /
+animate_big_cycle transition with sleeps stubbed out, and the peak memory of
+the event log, telemetry and batch history buffers. The app is imported in
+Streamlit's bare mode, so no server or browser is involved.
+
+Timings are the fastest of several samples, since a loaded machine only ever
+makes a run slower. The baseline keeps the best value of several runs plus
+their spread as each metric's `noise`, and a metric only regresses when it is
+worse than the baseline by more than --tolerance plus that noise. Apparent
+regressions are measured again up to --retries times, keeping the best value,
+before they count. Exits with status 1 on regressions that remain.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from batch import BatchSimulator
+from event_log import EventLog
+from simulator import INITIAL_STATE, MAX_TOTAL_BLOCKS, GravityBatterySimulator
+from telemetry import TelemetrySink
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+SCENE_SIZES = (0, 5, 10, 15, MAX_TOTAL_BLOCKS)  # blocks on top, and stored underground, per scene
+
+
+def metric(value, unit, better):
+    """One result entry; `better` is "higher" or "lower"."""
+    return {"value": value, "unit": unit, "better": better}
+
+
+def best_time(fn, repeat, number=1):
+    """
+    Fastest of `repeat` samples of the wall time per fn() call, each sample
+    timing `number` calls in a row. Like timeit, the minimum is used because
+    noise from other processes only ever adds time.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - started) / number)
+    return best
+
+
+def best_times(cases, repeat, number=1):
+    """
+    best_time() of every fn in `cases` ({name: (setup, fn)}), sampled round-robin
+    so that a slow spell of the machine costs each case one sample instead of
+    all samples of one case. setup() runs untimed before each sample.
+    """
+    best = dict.fromkeys(cases, float("inf"))
+    for _ in range(repeat):
+        for name, (setup, fn) in cases.items():
+            setup()
+            best[name] = min(best[name], best_time(fn, 1, number))
+    return best
+
+
+def no_setup():
+    pass
+
+
+def peak_bytes(fn):
+    """Peak traced allocation while fn() runs (what fn() keeps alive plus its temporaries)."""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def load_app():
+    """Import app.py without a Streamlit server, with every mode switched off."""
+    import streamlit as st
+    from streamlit import config, logger
+
+    # Silence the bare-mode warnings that every st.* call would log
+    config.set_option("logger.level", "error")
+    logger.set_log_level("error")
+    # Widgets do not write their keys to session state in bare mode
+    for key in ("client_animation", "background_sim", "turbo", "shared_view", "tower_mode"):
+        st.session_state[key] = False
+    import app
+    # Only the app's own frame delays are skipped; time.sleep itself stays intact
+    app.pause = lambda seconds: None
+    return app
+
+
+# ---------- BENCHMARKS ----------
+def bench_simulator(n_steps, repeat):
+    stepped, run, batch = GravityBatterySimulator(), GravityBatterySimulator(), BatchSimulator(1000)
+    seconds = best_times({
+        "step": (no_setup, lambda: [stepped.step() for _ in range(n_steps)]),
+        "run_callback": (no_setup, lambda: run.run(n_steps, callback=lambda result: None)),
+        "batch": (no_setup, lambda: batch.run(n_steps // 100, record_every=10)),
+    }, repeat)
+    return {
+        "simulator.step.steps_per_second": metric(n_steps / seconds["step"], "steps/s", "higher"),
+        "simulator.run_callback.steps_per_second": metric(n_steps / seconds["run_callback"], "steps/s", "higher"),
+        "batch.1000_configs.steps_per_second": metric(1000 * (n_steps // 100) / seconds["batch"], "steps/s", "higher"),
+    }
+
+
+def set_scene(app, blocks):
+    """Put `blocks` blocks on top and `blocks` blocks in storage, split over both sides."""
+    app.st.session_state.update(
+        INITIAL_STATE,
+        blocks_top_A=(blocks + 1) // 2,
+        blocks_top_B=blocks // 2,
+        tied_bottom_C=1,
+        tied_bottom_D=1,
+        storage_left=(blocks + 1) // 2 * 10,
+        storage_right=blocks // 2 * 10,
+        stop_requested=False,
+    )
+
+
+def bench_scene(app, repeat):
+    results = {}
+    moving_blocks = app.seesaw_frames("left", "#2b6cb0", "right", "#c53030")[25]
+
+    def draw():
+        return app.draw_scene(moving_blocks=moving_blocks)
+    seconds = best_times({blocks: (lambda blocks=blocks: set_scene(app, blocks), draw) for blocks in SCENE_SIZES}, repeat, number=10)
+    for blocks in SCENE_SIZES:
+        set_scene(app, blocks)
+        results[f"draw_scene.blocks_{blocks}.seconds"] = metric(seconds[blocks], "s", "lower")
+        results[f"draw_scene.blocks_{blocks}.json_bytes"] = metric(len(draw().to_json()), "bytes", "lower")
+    return results
+
+
+def bench_animation(app, repeat):
+    """One transition each, against a cold frame cache and then a warm one."""
+    results = {}
+    placeholder = app.st.empty()
+    cache = app.get_frame_cache()
+    set_scene(app, MAX_TOTAL_BLOCKS // 2)
+    transitions = {
+        "animate_seesaw": lambda: app.animate_seesaw(placeholder, "left", "#2b6cb0", "right", "#c53030"),
+        "animate_big_cycle": lambda: app.animate_big_cycle(placeholder, steps=60),
+    }
+    cases = {}
+    for name, play in transitions.items():
+        cases[f"{name}.cold.seconds"] = (cache.clear, play)
+        cases[f"{name}.warm.seconds"] = (no_setup, play)
+    for name, seconds in best_times(cases, repeat).items():
+        results[name] = metric(seconds, "s", "lower")
+    return results
+
+
+def bench_memory(app):
+    results = {}
+    sim = GravityBatterySimulator()
+
+    def fill_log():
+        log = EventLog(app.LOG_CAPACITY)
+        for _ in range(2 * app.LOG_CAPACITY):
+            sim.step()
+            log.record("state", sim.to_state())
+        log.text(last=app.LOG_WINDOW)
+    results["event_log.peak_bytes"] = metric(peak_bytes(fill_log), "bytes", "lower")
+
+    with tempfile.TemporaryDirectory() as directory:
+        def fill_telemetry():
+            sink = TelemetrySink(directory, chunk_size=4096)  # the app's chunk size
+            sim.run(4096, callback=sink.recorder(sim))
+            sink.close()
+        results["telemetry.chunk_4096.peak_bytes"] = metric(peak_bytes(fill_telemetry), "bytes", "lower")
+
+    def fill_history():
+        BatchSimulator(1000).run(1000, record_every=10)
+    results["batch_history.1000x100.peak_bytes"] = metric(peak_bytes(fill_history), "bytes", "lower")
+    return results
+
+
+def run_all(quick=False):
+    app = load_app()
+    repeat = 5 if quick else 10
+    metrics = {}
+    metrics.update(bench_simulator(20_000 if quick else 200_000, repeat))
+    metrics.update(bench_scene(app, repeat * 3))
+    metrics.update(bench_animation(app, repeat))
+    metrics.update(bench_memory(app))
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "numpy": np.__version__,
+            "quick": quick,
+        },
+        "metrics": metrics,
+    }
+
+
+# ---------- BASELINE ----------
+def combine(runs):
+    """The best value of every metric over several runs, with the spread between the runs as its `noise` fraction."""
+    combined = dict(runs[0], metrics={})
+    for name, first in runs[0]["metrics"].items():
+        values = [run["metrics"][name]["value"] for run in runs]
+        best = max(values) if first["better"] == "higher" else min(values)
+        noise = (max(values) - min(values)) / best if best else 0.0
+        combined["metrics"][name] = dict(first, value=best, noise=noise)
+    return combined
+
+
+def compare(results, baseline, tolerance):
+    """
+    Metrics worse than the baseline by more than `tolerance` (a fraction) plus
+    the baseline's noise for that metric, as (name, old, new, change).
+    """
+    regressions = []
+    for name, new in results["metrics"].items():
+        old = baseline["metrics"].get(name)
+        if old is None or not old["value"]:
+            continue
+        change = (new["value"] - old["value"]) / old["value"]
+        worse = -change if new["better"] == "higher" else change
+        if worse > tolerance + old.get("noise", 0.0):
+            regressions.append((name, old["value"], new["value"], change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON to compare against")
+    parser.add_argument("--output", help="also write the results JSON to this file")
+    parser.add_argument("--save-baseline", action="store_true", help="write the results to --baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed fractional slowdown/growth per metric")
+    parser.add_argument("--retries", type=int, default=2, help="re-runs to confirm apparent regressions")
+    parser.add_argument("--baseline-runs", type=int, default=3, help="runs combined into a new baseline")
+    parser.add_argument("--quick", action="store_true", help="fewer steps and repeats (noisier)")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    runs = [run_all(quick=args.quick) for _ in range(args.baseline_runs if args.save_baseline else 1)]
+    results = combine(runs)
+    regressions = compare(results, baseline, args.tolerance) if baseline is not None else []
+    for attempt in range(args.retries):
+        if not regressions:
+            break
+        print(f"{len(regressions)} metric(s) over the tolerance; measuring again ({attempt + 1}/{args.retries}).", file=sys.stderr)
+        runs.append(run_all(quick=args.quick))
+        results = combine(runs)
+        regressions = compare(results, baseline, args.tolerance)
+
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            f.write(text + "\n")
+        return 0
+    if baseline is None:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one.", file=sys.stderr)
+        return 0
+    for name, old, new, change in regressions:
+        print(f"REGRESSION {name}: {old:.6g} -> {new:.6g} ({change:+.1%})", file=sys.stderr)
+    if not regressions:
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.baseline}.", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
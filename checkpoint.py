@@ -0,0 +1,100 @@
+"""
+Compact binary checkpoints of a GravityBatterySimulator.
+
+A checkpoint is one fixed-size little-endian record (140 bytes): magic,
+format version, the SimulationConfig, every STATE_FIELDS value and a CRC32.
+Floats are stored as doubles and step_count in full, so the drop alternation
+parity and the battery/generator values come back bit for bit, and a loaded
+simulator continues exactly like the one that was saved. replay() then
+advances a loaded run headlessly to any later step.
+"""
+import os
+import struct
+import tempfile
+import zlib
+
+from simulator import GravityBatterySimulator, SimulationConfig
+
+MAGIC = b"GBCK"
+VERSION = 1
+
+# magic, version, gravity, height, b1/b2 capacity, storage threshold, max blocks,
+# step_count, A, B, C, D, storage L, storage R, B1, B2, angle, houses_lit, int flags
+_RECORD = struct.Struct("<4sHddddqqq6qddd?B")
+_CRC = struct.Struct("<I")
+SIZE = _RECORD.size + _CRC.size
+
+# Fields that start out as int 0 and only become floats once charged; the
+# flags keep their type so restored values format exactly like the originals
+_NUMERIC_FIELDS = ("battery1", "battery2", "generator_angle")
+
+
+def dumps(sim):
+    """Checkpoint bytes of `sim`'s config and full state."""
+    config = sim.config
+    flags = sum(1 << i for i, name in enumerate(_NUMERIC_FIELDS) if isinstance(getattr(sim, name), int))
+    record = _RECORD.pack(
+        MAGIC, VERSION,
+        config.gravity, config.height, config.b1_capacity, config.b2_capacity,
+        config.storage_threshold, config.max_total_blocks,
+        sim.step_count, sim.blocks_top_A, sim.blocks_top_B, sim.tied_bottom_C, sim.tied_bottom_D,
+        sim.storage_left, sim.storage_right,
+        sim.battery1, sim.battery2, sim.generator_angle, bool(sim.houses_lit), flags,
+    )
+    return record + _CRC.pack(zlib.crc32(record))
+
+
+def loads(data):
+    """Rebuild the simulator saved by dumps(). Raises ValueError for anything that is not a valid checkpoint."""
+    if len(data) != SIZE:
+        raise ValueError(f"Checkpoint must be {SIZE} bytes, got {len(data)}")
+    record, (crc,) = data[:_RECORD.size], _CRC.unpack(data[_RECORD.size:])
+    if zlib.crc32(record) != crc:
+        raise ValueError("Checkpoint is corrupted (CRC mismatch)")
+    (magic, version, gravity, height, b1_capacity, b2_capacity, storage_threshold, max_total_blocks,
+     step_count, a, b, c, d, storage_left, storage_right,
+     battery1, battery2, generator_angle, houses_lit, flags) = _RECORD.unpack(record)
+    if magic != MAGIC:
+        raise ValueError("Not a gravity battery checkpoint")
+    if version != VERSION:
+        raise ValueError(f"Unsupported checkpoint version {version}")
+
+    config = SimulationConfig(gravity, height, b1_capacity, b2_capacity, storage_threshold, max_total_blocks)
+    numeric = dict(zip(_NUMERIC_FIELDS, (battery1, battery2, generator_angle)))
+    for i, name in enumerate(_NUMERIC_FIELDS):
+        if flags & (1 << i):
+            numeric[name] = int(numeric[name])
+    return GravityBatterySimulator(
+        config,
+        step_count=step_count, blocks_top_A=a, blocks_top_B=b, tied_bottom_C=c, tied_bottom_D=d,
+        storage_left=storage_left, storage_right=storage_right, houses_lit=houses_lit, **numeric,
+    )
+
+
+def save(sim, path):
+    """
+    Write a checkpoint atomically, so a crash never leaves a half-written file
+    at `path`. Concurrent saves to the same path each use their own temporary
+    file, and the last one to finish wins.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(dumps(sim))
+    os.replace(tmp_path, path)
+
+
+def load(path):
+    with open(path, "rb") as f:
+        return loads(f.read())
+
+
+def replay(sim, target_step):
+    """
+    Advance `sim` headlessly until its step_count is `target_step`.
+
+    Uses run() rather than fast_forward(), so the result matches a run that
+    was never interrupted exactly, floating-point digits included.
+    """
+    if target_step < sim.step_count:
+        raise ValueError(f"Cannot replay backwards from step {sim.step_count} to {target_step}")
+    return sim.run(target_step - sim.step_count)
@@ -0,0 +1,179 @@
+"""
+Fixed-capacity ring buffer of typed simulation events.
+
+Events are stored as small __slots__ records (step, kind, masses, battery
+levels, angle) and only turned into text when a window of them is displayed.
+Appending overwrites the oldest slot in O(1); optionally every event is also
+spilled to a binary file in batches so long runs keep their full history.
+"""
+import struct
+
+from simulator import B1_CAPACITY, B2_CAPACITY, BIG_LIFT_JOULES
+
+KINDS = ("message", "state", "drop", "big_cycle_start", "big_cycle")
+SIDES = (None, "left", "right")
+
+# step, kind, side, mass_kg, energy, A, B, C, D, storage L, storage R, B1, B2, angle, houses_lit, int flags, len(detail)
+_SPILL_RECORD = struct.Struct("<qBBid6iddd?BI")
+
+# Fields that start out as int 0 and only become floats once charged; the
+# flags keep their type so spilled events format exactly like the originals
+_NUMERIC_FIELDS = ("battery1", "battery2", "generator_angle")
+
+_EMPTY_STATE = {
+    "blocks_top_A": 0, "blocks_top_B": 0, "tied_bottom_C": 0, "tied_bottom_D": 0,
+    "storage_left": 0, "storage_right": 0, "battery1": 0, "battery2": 0,
+    "generator_angle": 0, "houses_lit": False, "step_count": 0,
+}
+
+
+class LogEvent:
+    __slots__ = (
+        "step", "kind", "side", "mass_kg", "energy",
+        "blocks_top_A", "blocks_top_B", "tied_bottom_C", "tied_bottom_D",
+        "storage_left", "storage_right", "battery1", "battery2",
+        "generator_angle", "houses_lit", "detail",
+    )
+
+    def __init__(self, step, kind, state, side=None, mass_kg=0, energy=0.0, detail=""):
+        self.step = step
+        self.kind = kind
+        self.side = side
+        self.mass_kg = mass_kg
+        self.energy = energy
+        self.blocks_top_A = state["blocks_top_A"]
+        self.blocks_top_B = state["blocks_top_B"]
+        self.tied_bottom_C = state["tied_bottom_C"]
+        self.tied_bottom_D = state["tied_bottom_D"]
+        self.storage_left = state["storage_left"]
+        self.storage_right = state["storage_right"]
+        self.battery1 = state["battery1"]
+        self.battery2 = state["battery2"]
+        self.generator_angle = state["generator_angle"]
+        self.houses_lit = state["houses_lit"]
+        self.detail = detail
+
+    def state_text(self):
+        total_storage = self.storage_left + self.storage_right
+        return (
+            f"--- Step {self.step} ---\n"
+            f"Top A: {self.blocks_top_A * 10}kg | Top B: {self.blocks_top_B * 10}kg\n"
+            f"Tied C: {self.tied_bottom_C * 10}kg | Tied D: {self.tied_bottom_D * 10}kg\n"
+            f"Storage L: {self.storage_left}kg | Storage R: {self.storage_right}kg | Total: {total_storage}kg\n"
+            f"B1: {self.battery1}% | B2: {self.battery2}% | Gen: {self.generator_angle}°\n"
+            f"Houses: {'lit' if self.houses_lit else 'dark'}"
+        )
+
+    def text(self):
+        if self.kind == "state":
+            return self.state_text()
+        if self.kind == "drop":
+            lift_to, drop_to, add_side = ("B", "C", "B") if self.side == "left" else ("A", "D", "A")
+            return (
+                f"Action: Dropped 20kg from {self.side.upper()} to {drop_to}, stored 10kg, tied 10kg. "
+                f"Lifted {self.mass_kg}kg to {lift_to}. B1 +{(self.energy / B1_CAPACITY) * 100:.1f}%, "
+                f"Generator +{(self.energy / B1_CAPACITY) * 360:.0f}°.\n"
+                f"Action: Added 10kg to {add_side}."
+            )
+        if self.kind == "big_cycle_start":
+            return f"Action: Big cycle triggered (Storage = {self.mass_kg}kg). Dropping 160kg..."
+        if self.kind == "big_cycle":
+            return (
+                f"{self.state_text()}\n"
+                f"Action: Big cycle: Dropped 160kg, B2 +{(self.energy / B2_CAPACITY) * 100:.1f}%, "
+                f"Gen +{(self.energy / B2_CAPACITY) * 360:.0f}°. Reset storages. "
+                f"Used {(BIG_LIFT_JOULES / B2_CAPACITY) * 100:.1f}% B2 to lift 160kg."
+            )
+        return self.detail
+
+
+class EventLog:
+    """
+    Ring buffer holding the last `capacity` events.
+
+    spill_path: optional file that receives every event in a compact binary
+    form, written in batches of `spill_batch` events (see read_spill()).
+    """
+
+    def __init__(self, capacity=1000, spill_path=None, spill_batch=256):
+        self.capacity = capacity
+        self.spill_path = spill_path
+        self.spill_batch = spill_batch
+        self._events = [None] * capacity
+        self._next = 0
+        self._count = 0
+        self._pending = []
+
+    def __len__(self):
+        return self._count
+
+    def append(self, event):
+        self._events[self._next] = event
+        self._next = (self._next + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+        if self.spill_path is not None:
+            self._pending.append(event)
+            if len(self._pending) >= self.spill_batch:
+                self.flush()
+
+    def record(self, kind, state, step=None, **fields):
+        """Append an event of `kind` carrying a copy of `state` (a simulator/session-state mapping)."""
+        self.append(LogEvent(state["step_count"] if step is None else step, kind, state, **fields))
+
+    def message(self, text, state=None):
+        """Append a free-text event; the state fields are zeros when no state is given."""
+        state = _EMPTY_STATE if state is None else state
+        self.append(LogEvent(state["step_count"], "message", state, detail=text))
+
+    def events(self, last=None):
+        """Events oldest first, limited to the `last` most recent ones if given."""
+        count = self._count if last is None else min(last, self._count)
+        start = (self._next - count) % self.capacity
+        return [self._events[(start + i) % self.capacity] for i in range(count)]
+
+    def text(self, last=None):
+        """Formatted text of the visible window only."""
+        return "\n".join(event.text() for event in self.events(last))
+
+    def clear(self):
+        self.flush()
+        self._events = [None] * self.capacity
+        self._next = 0
+        self._count = 0
+
+    def flush(self):
+        if not self._pending:
+            return
+        chunks = []
+        for event in self._pending:
+            detail = event.detail.encode("utf-8")
+            flags = sum(1 << i for i, name in enumerate(_NUMERIC_FIELDS) if isinstance(getattr(event, name), int))
+            chunks.append(_SPILL_RECORD.pack(
+                event.step, KINDS.index(event.kind), SIDES.index(event.side), event.mass_kg, event.energy,
+                event.blocks_top_A, event.blocks_top_B, event.tied_bottom_C, event.tied_bottom_D,
+                event.storage_left, event.storage_right,
+                event.battery1, event.battery2, event.generator_angle, event.houses_lit, flags, len(detail),
+            ))
+            chunks.append(detail)
+        with open(self.spill_path, "ab") as f:
+            f.write(b"".join(chunks))
+        self._pending = []
+
+
+def read_spill(path):
+    """Yield every LogEvent written to a spill file, oldest first."""
+    with open(path, "rb") as f:
+        while True:
+            header = f.read(_SPILL_RECORD.size)
+            if len(header) < _SPILL_RECORD.size:
+                return
+            (step, kind, side, mass_kg, energy, a, b, c, d, storage_left, storage_right,
+             battery1, battery2, angle, houses_lit, flags, detail_len) = _SPILL_RECORD.unpack(header)
+            detail = f.read(detail_len).decode("utf-8")
+            state = {
+                "blocks_top_A": a, "blocks_top_B": b, "tied_bottom_C": c, "tied_bottom_D": d,
+                "storage_left": storage_left, "storage_right": storage_right, "houses_lit": houses_lit,
+            }
+            for i, (name, value) in enumerate(zip(_NUMERIC_FIELDS, (battery1, battery2, angle))):
+                state[name] = int(value) if flags & (1 << i) else value
+            yield LogEvent(step, KINDS[kind], state, SIDES[side], mass_kg, energy, detail)
@@ -0,0 +1,52 @@
+"""
+LRU-bounded cache for pre-rendered animation frames.
+
+Keys are small hashable tuples describing what a frame shows; values are the
+built frames (Plotly figures in the app). The cache never builds anything
+itself, so it has no Streamlit or Plotly dependency.
+"""
+import threading
+from collections import OrderedDict
+
+
+class FrameCache:
+    """
+    Thread-safe LRU mapping of frame keys to built frames.
+
+    `lock` is exposed so callers can hold it while they touch a cached frame
+    (e.g. update its labels and hand it to the renderer) without another
+    session doing the same concurrently.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self._frames = OrderedDict()
+
+    def get(self, key):
+        with self.lock:
+            frame = self._frames.get(key)
+            if frame is None:
+                self.misses += 1
+                return None
+            self._frames.move_to_end(key)
+            self.hits += 1
+            return frame
+
+    def put(self, key, frame):
+        with self.lock:
+            self._frames[key] = frame
+            self._frames.move_to_end(key)
+            while len(self._frames) > self.maxsize:
+                self._frames.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self._frames.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._frames)
@@ -0,0 +1,103 @@
+"""
+Opt-in per-phase timers and counters for the app's hot paths.
+
+Code wraps a phase in `with instruments.phase("draw_scene"): ...` and bumps
+counters with instruments.count("steps"). Nothing is measured until
+`instruments.enabled` is set, so the disabled cost is one attribute check.
+Each phase keeps a rolling window of its latest durations; snapshot() turns
+them into p50/p99 figures and subscribe() streams every sample as it is taken.
+"""
+import threading
+import time
+from collections import deque, namedtuple
+from contextlib import contextmanager
+
+PhaseStats = namedtuple("PhaseStats", ["calls", "total_seconds", "p50", "p99", "last"])
+
+
+def _percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted, non-empty list."""
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class Instrumentation:
+    """
+    Rolling per-phase latencies (the last `window` samples per phase) and counters.
+
+    calls/total_seconds cover every sample since the last reset(); p50, p99
+    and last only the rolling window. Safe to use from several sessions'
+    script threads at once.
+    """
+
+    def __init__(self, window=1000, enabled=False):
+        self.window = window
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._calls = {}
+        self._totals = {}
+        self._counters = {}
+        self._subscribers = []
+
+    @contextmanager
+    def phase(self, name):
+        """Time the body of the with-block as one sample of phase `name`."""
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def record(self, name, seconds):
+        """Add one duration sample, e.g. for phases that cannot be wrapped in a with-block."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if name not in self._samples:
+                self._samples[name] = deque(maxlen=self.window)
+                self._calls[name] = 0
+                self._totals[name] = 0.0
+            self._samples[name].append(seconds)
+            self._calls[name] += 1
+            self._totals[name] += seconds
+        for callback in list(self._subscribers):
+            callback(name, seconds)
+
+    def count(self, name, n=1):
+        if self.enabled:
+            with self._lock:
+                self._counters[name] = self._counters.get(name, 0) + n
+
+    def counters(self):
+        with self._lock:
+            return dict(self._counters)
+
+    def snapshot(self):
+        """PhaseStats per phase name, in the order the phases were first seen."""
+        with self._lock:
+            samples = {name: (sorted(window), window[-1]) for name, window in self._samples.items()}
+            calls = dict(self._calls)
+            totals = dict(self._totals)
+        return {
+            name: PhaseStats(calls[name], totals[name], _percentile(ordered, 0.5), _percentile(ordered, 0.99), last)
+            for name, (ordered, last) in samples.items()
+        }
+
+    def subscribe(self, callback):
+        """Call callback(phase, seconds) for every new sample. Returns a function that unsubscribes."""
+        self._subscribers.append(callback)
+        return lambda: self._subscribers.remove(callback)
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._calls.clear()
+            self._totals.clear()
+            self._counters.clear()
+
+
+# The process-wide instance the app records into
+instruments = Instrumentation()
@@ -0,0 +1,141 @@
+"""
+Background simulation runner.
+
+SimulationRunner drives a GravityBatterySimulator from an asyncio task on a
+shared event-loop thread, at its own tick rate, and publishes a state snapshot
+after every step. The UI only reads snapshots (latest() or subscribe()), so it
+never blocks the simulation and stop() takes effect at the next await.
+
+shared_runner() keeps one runner per scenario name for the whole process, so
+any number of viewers can watch the same simulation without each of them
+stepping (or sleeping through) a copy of it.
+
+Viewers call touch() whenever they poll; a runner with an idle_timeout stops
+itself once nobody has polled it for that long (e.g. every tab was closed),
+and start() picks up where it left off. A task that dies with an exception
+keeps it in `error` and logs it instead of failing silently.
+"""
+import asyncio
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_loop = None
+_loop_lock = threading.Lock()
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def event_loop():
+    """The process-wide asyncio loop that background simulations run on (started on first use)."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="simulation-loop", daemon=True).start()
+        return _loop
+
+
+class SimulationRunner:
+    """
+    Steps `sim` every `tick` seconds (0 = as fast as possible) until stopped,
+    or until `idle_timeout` seconds pass without a touch().
+
+    latest() returns the most recent snapshot: sim.to_state() plus the last
+    StepResult under "last_step". Subscribers are called on the loop thread
+    with every new snapshot and must not block; an exception in one of them
+    (or in the simulator) stops the runner and is kept in `error`.
+    """
+
+    def __init__(self, sim, tick=0.5, idle_timeout=None):
+        self.sim = sim
+        self.tick = tick
+        self.idle_timeout = idle_timeout
+        self.steps_per_second = 0.0
+        self.error = None
+        self._last_touch = time.monotonic()
+        self._snapshot = dict(sim.to_state(), last_step=None)
+        self._subscribers = []
+        self._future = None
+
+    @property
+    def running(self):
+        return self._future is not None and not self._future.done()
+
+    def start(self):
+        if not self.running:
+            self.error = None
+            self.touch()
+            self._future = asyncio.run_coroutine_threadsafe(self._run(), event_loop())
+            self._future.add_done_callback(self._finished)
+        return self
+
+    def touch(self):
+        """Tell the runner someone is still watching (resets the idle timeout)."""
+        self._last_touch = time.monotonic()
+
+    def _finished(self, future):
+        if future.cancelled():
+            return
+        self.steps_per_second = 0.0
+        error = future.exception()
+        if error is not None:
+            self.error = error
+            logger.error("Background simulation stopped at step %s", self.sim.step_count, exc_info=error)
+
+    def stop(self):
+        """Cancel the task; it stops at its next await, i.e. within one tick."""
+        if self._future is not None:
+            self._future.cancel()
+        return self
+
+    def latest(self):
+        return self._snapshot
+
+    def subscribe(self, callback):
+        """Call callback(snapshot) after every step. Returns a function that unsubscribes."""
+        self._subscribers.append(callback)
+        return lambda: self._subscribers.remove(callback)
+
+    def _publish(self, result):
+        self._snapshot = dict(self.sim.to_state(), last_step=result)
+        for callback in list(self._subscribers):
+            callback(self._snapshot)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        window_start, window_steps = time.perf_counter(), 0
+        while self.idle_timeout is None or time.monotonic() - self._last_touch < self.idle_timeout:
+            self._publish(self.sim.step())
+            window_steps += 1
+            elapsed = time.perf_counter() - window_start
+            if elapsed >= 1.0:
+                self.steps_per_second = window_steps / elapsed
+                window_start, window_steps = time.perf_counter(), 0
+            # Fixed tick rate, independent of how often the UI renders
+            next_tick += self.tick
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+
+
+def shared_runner(name, sim_factory, tick=0.5, idle_timeout=None):
+    """
+    The process-wide runner of scenario `name`, started on first use with
+    sim_factory() as its simulator. Later calls return the same runner,
+    touched and restarted if it went idle, and ignore the other arguments.
+    """
+    with _shared_lock:
+        runner = _shared.get(name)
+        if runner is None:
+            runner = _shared[name] = SimulationRunner(sim_factory(), tick=tick, idle_timeout=idle_timeout)
+        runner.touch()
+        # A runner that failed stays stopped, so its viewers see the error instead of a restart loop
+        return runner if runner.error is not None else runner.start()
+
+
+def shared_runners():
+    """Snapshot of the shared runners by scenario name."""
+    with _shared_lock:
+        return dict(_shared)
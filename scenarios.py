@@ -0,0 +1,154 @@
+"""
+Multiprocess scenario farm.
+
+run_scenarios() spreads independent scenarios over a process pool. Every
+worker steps its chunk with a BatchSimulator and writes the time series
+straight into one shared-memory (or memory-mapped .npy) result buffer, so
+nothing but a small per-worker stats record is pickled back to the parent.
+"""
+import os
+import tempfile
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from batch import SWEEP_PARAMS, BatchHistory, BatchSimulator
+
+# Order of the series along the first axis of the result buffer
+SERIES = ("battery1", "battery2", "generator_angle", "houses_lit")
+
+# Results larger than this (bytes) go to a temporary memory-mapped .npy file
+# instead of shared memory, which has to be copied out before it is released
+SHARED_MEMORY_LIMIT = 256 * 2**20
+
+WorkerStats = namedtuple("WorkerStats", ["pid", "scenarios", "steps", "seconds", "steps_per_second"])
+ScenarioResults = namedtuple("ScenarioResults", ["history", "workers"])
+
+
+def _scenario_params(configs):
+    """Turn a list of per-scenario dicts into one array per SWEEP_PARAMS key."""
+    params = {name: [] for name in SWEEP_PARAMS}
+    for i, config in enumerate(configs):
+        unknown = set(config) - set(SWEEP_PARAMS)
+        if unknown:
+            raise TypeError(f"Scenario {i}: unknown parameters: {', '.join(sorted(unknown))}")
+        for name, default in SWEEP_PARAMS.items():
+            params[name].append(config.get(name, default))
+    return {name: np.asarray(values) for name, values in params.items()}
+
+
+def _history_views(buffer, steps, start=0, stop=None):
+    # buffer has shape (len(SERIES), n_samples, n_scenarios); houses_lit is stored as 0.0/1.0
+    columns = slice(start, stop)
+    return BatchHistory(steps, *(buffer[i, :, columns] for i in range(len(SERIES))))
+
+
+def _open_buffer(buffer_ref, shape):
+    kind, location = buffer_ref
+    if kind == "shm":
+        shm = shared_memory.SharedMemory(name=location)
+        return shm, np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    return None, np.load(location, mmap_mode="r+")
+
+
+def _run_chunk(buffer_ref, shape, start, stop, params, n_steps, record_every):
+    began = time.perf_counter()
+    shm, buffer = _open_buffer(buffer_ref, shape)
+    try:
+        sim = BatchSimulator(stop - start, **params)
+        steps = np.empty(shape[1], dtype=np.int64)
+        sim.run(n_steps, record_every, out=_history_views(buffer, steps, start, stop))
+        if shm is None:
+            buffer.flush()
+    finally:
+        del buffer
+        if shm is not None:
+            shm.close()
+    seconds = time.perf_counter() - began
+    scenario_steps = (stop - start) * n_steps
+    return WorkerStats(os.getpid(), stop - start, scenario_steps, seconds, scenario_steps / seconds if seconds else float("inf"))
+
+
+def _per_worker(chunk_stats):
+    """Merge per-chunk stats of the same process into one WorkerStats per worker."""
+    totals = {}
+    for stats in chunk_stats:
+        scenarios, steps, seconds = totals.get(stats.pid, (0, 0, 0.0))
+        totals[stats.pid] = (scenarios + stats.scenarios, steps + stats.steps, seconds + stats.seconds)
+    return [
+        WorkerStats(pid, scenarios, steps, seconds, steps / seconds if seconds else float("inf"))
+        for pid, (scenarios, steps, seconds) in sorted(totals.items())
+    ]
+
+
+def run_scenarios(configs, n_steps, workers=None, record_every=1, chunk_size=None, out_path=None):
+    """
+    Run every scenario in `configs` for n_steps steps across `workers` processes.
+
+    configs: list of dicts using the keys of batch.SWEEP_PARAMS (app constants
+    and initial stacks); missing keys take the app defaults.
+    out_path: optional .npy path; when given the results stay memory-mapped
+    there instead of living in shared memory.
+
+    Without out_path, results up to SHARED_MEMORY_LIMIT bytes are copied out
+    of shared memory into ordinary arrays, so they briefly need twice their
+    size in RAM. Larger results are memory-mapped from a temporary file that
+    is deleted as soon as it is mapped (the data lives until the arrays are
+    gone); pass out_path to keep such a file.
+
+    Returns ScenarioResults(history, workers) where history is a BatchHistory
+    with arrays of shape (n_samples, n_scenarios) and workers holds one
+    WorkerStats (scenario-steps per second) per worker process.
+    """
+    params = _scenario_params(configs)
+    n_scenarios = len(configs)
+    workers = workers or os.cpu_count()
+    chunk_size = chunk_size or max(1, -(-n_scenarios // workers))
+    n_samples = n_steps // record_every
+    shape = (len(SERIES), n_samples, n_scenarios)
+    size = int(np.prod(shape)) * 8
+    temporary = out_path is None and size > SHARED_MEMORY_LIMIT
+    if temporary:
+        fd, out_path = tempfile.mkstemp(suffix=".npy")
+        os.close(fd)
+
+    shm = None
+    if out_path is None:
+        shm = shared_memory.SharedMemory(create=True, size=max(1, size))
+        buffer_ref = ("shm", shm.name)
+    else:
+        np.lib.format.open_memmap(out_path, mode="w+", dtype=np.float64, shape=shape).flush()
+        buffer_ref = ("npy", out_path)
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(
+                    _run_chunk, buffer_ref, shape, start, min(start + chunk_size, n_scenarios),
+                    {name: values[start:start + chunk_size] for name, values in params.items()},
+                    n_steps, record_every,
+                )
+                for start in range(0, n_scenarios, chunk_size)
+            ]
+            stats = [future.result() for future in futures]
+
+        steps = np.arange(1, n_samples + 1, dtype=np.int64) * record_every
+        if shm is None:
+            history = _history_views(np.load(out_path, mmap_mode="r+"), steps)
+        else:
+            buffer = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+            history = _history_views(buffer.copy(), steps)
+            del buffer
+    finally:
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+        if temporary:
+            # The mapping keeps the data reachable after the file is removed (POSIX)
+            os.remove(out_path)
+
+    history = history._replace(houses_lit=history.houses_lit.astype(bool))
+    return ScenarioResults(history, _per_worker(stats))
@@ -0,0 +1,216 @@
+"""
+Headless gravity battery seesaw simulation.
+
+Pure-Python model of the A/B seesaw used by the Streamlit app. It carries the
+same state as the app's session state and applies the same drop, alternation
+and big-cycle rules, but never imports Streamlit or Plotly and never sleeps.
+"""
+from collections import namedtuple
+from dataclasses import dataclass
+
+# ---------- CONFIG ----------
+GRAVITY = 9.81      # m/s²
+HEIGHT = 100        # m (from +50m to -50m)
+B1_CAPACITY = 100_000  # Joules (100 kJ for Battery 1)
+B2_CAPACITY = 1_000_000  # Joules (1 MJ for Battery 2)
+STORAGE_THRESHOLD = 80  # kg to trigger big cycle
+MAX_TOTAL_BLOCKS = 20  # Max blocks (200kg) at A and B combined
+BLOCK_KG = 10       # kg per block
+DROP_KG = 20        # kg dropped per small drop
+BIG_DROP_KG = 160   # kg dropped in a big cycle
+BIG_LIFT_JOULES = 80_000  # energy taken from B2 to lift the big block back up
+
+STATE_FIELDS = (
+    "blocks_top_A", "blocks_top_B", "tied_bottom_C", "tied_bottom_D",
+    "storage_left", "storage_right", "battery1", "battery2",
+    "generator_angle", "houses_lit", "step_count",
+)
+
+INITIAL_STATE = {
+    "blocks_top_A": 1,  # initial 10 kg = 1 block
+    "blocks_top_B": 2,  # initial 20 kg = 2 blocks
+    "tied_bottom_C": 0,
+    "tied_bottom_D": 0,
+    "storage_left": 0,
+    "storage_right": 0,
+    "battery1": 0,  # small battery % (0-100)
+    "battery2": 0,  # big battery % (0-100)
+    "generator_angle": 0,
+    "houses_lit": False,
+    "step_count": 0,
+}
+
+# side: "left"/"right" or None when no drop condition was met
+# lifted: number of tied blocks lifted back to the opposite top
+StepResult = namedtuple("StepResult", ["step", "side", "lifted", "big_cycle"])
+
+
+@dataclass(frozen=True)
+class SimulationConfig:
+    gravity: float = GRAVITY
+    height: float = HEIGHT
+    b1_capacity: float = B1_CAPACITY
+    b2_capacity: float = B2_CAPACITY
+    storage_threshold: int = STORAGE_THRESHOLD
+    max_total_blocks: int = MAX_TOTAL_BLOCKS
+
+    @property
+    def drop_energy(self):
+        return DROP_KG * self.gravity * self.height  # 19,620 J by default
+
+    @property
+    def big_cycle_energy(self):
+        return BIG_DROP_KG * self.gravity * self.height  # 156,960 J by default
+
+
+class GravityBatterySimulator:
+    """
+    State machine for one A/B seesaw pair.
+
+    step() runs one simulation step exactly like the app's SIMULATION STEP
+    block; drop_side(), apply_drop(), big_cycle_due() and apply_big_cycle()
+    expose the individual phases so the UI can animate between them.
+    """
+
+    def __init__(self, config=None, **state):
+        self.config = config or SimulationConfig()
+        unknown = set(state) - set(STATE_FIELDS)
+        if unknown:
+            raise TypeError(f"Unknown state fields: {', '.join(sorted(unknown))}")
+        for name in STATE_FIELDS:
+            setattr(self, name, state.get(name, INITIAL_STATE[name]))
+
+    @classmethod
+    def from_state(cls, mapping, config=None):
+        """Build a simulator from any mapping holding STATE_FIELDS (e.g. st.session_state)."""
+        return cls(config, **{name: mapping[name] for name in STATE_FIELDS if name in mapping})
+
+    def to_state(self):
+        return {name: getattr(self, name) for name in STATE_FIELDS}
+
+    # ---------- RULES ----------
+    def drop_side(self):
+        """Side that drops 20kg at the current step_count, or None."""
+        if self.blocks_top_A == 2 and self.blocks_top_B < 2:
+            return "left"
+        if self.blocks_top_B == 2 and self.blocks_top_A < 2:
+            return "right"
+        if self.blocks_top_A == 2 and self.blocks_top_B == 2:
+            # Alternate drops when both sides have 2 blocks
+            return "left" if self.step_count % 2 == 0 else "right"
+        return None
+
+    def lift_count(self, side):
+        """Tied blocks on the opposite bottom that a drop from `side` lifts."""
+        return self.tied_bottom_D if side == "left" else self.tied_bottom_C
+
+    def apply_drop(self, side):
+        """Drop 20kg from `side`, charge B1 and add 10kg to the opposite top."""
+        lifted = self.lift_count(side)
+        if side == "left":
+            self.blocks_top_A = 0
+            self.storage_left += BLOCK_KG
+            self.tied_bottom_C += 1
+            self.tied_bottom_D = 0
+            self.blocks_top_B += lifted
+        else:
+            self.blocks_top_B = 0
+            self.storage_right += BLOCK_KG
+            self.tied_bottom_D += 1
+            self.tied_bottom_C = 0
+            self.blocks_top_A += lifted
+
+        energy_joules = self.config.drop_energy
+        self.battery1 = min(self.battery1 + (energy_joules / self.config.b1_capacity) * 100, 100)
+        self.generator_angle += (energy_joules / self.config.b1_capacity) * 360  # Proportional rotation
+        self.houses_lit = self.battery1 >= 10
+
+        # Add 10kg to opposite side
+        if side == "left":
+            self.blocks_top_B += 1
+        else:
+            self.blocks_top_A += 1
+        return lifted
+
+    def big_cycle_due(self):
+        return self.storage_left + self.storage_right >= self.config.storage_threshold
+
+    def apply_big_cycle(self):
+        """Drop 160kg into B2, reset storages and pay the lift cost from B2."""
+        energy_joules = self.config.big_cycle_energy
+        b2_capacity = self.config.b2_capacity
+        self.generator_angle += (energy_joules / b2_capacity) * 360
+        self.battery2 = min(self.battery2 + (energy_joules / b2_capacity) * 100, 100)
+        self.storage_left = 0
+        self.storage_right = 0
+        self.battery2 = max(self.battery2 - (BIG_LIFT_JOULES / b2_capacity) * 100, 0)
+        self.houses_lit = self.battery1 >= 10
+
+    # ---------- STEPPING ----------
+    def step(self):
+        self.step_count += 1
+        side = self.drop_side()
+        if side is None:
+            return StepResult(self.step_count, None, 0, False)
+        lifted = self.apply_drop(side)
+        big_cycle = self.big_cycle_due()
+        if big_cycle:
+            self.apply_big_cycle()
+        return StepResult(self.step_count, side, lifted, big_cycle)
+
+    def run(self, n_steps, callback=None):
+        """
+        Advance n_steps steps, calling callback(result) after each one if given.
+
+        A step without a drop leaves every counter but step_count untouched, so
+        once that happens the remaining steps are skipped in one go.
+        """
+        for done in range(n_steps):
+            result = self.step()
+            if callback is not None:
+                callback(result)
+            if result.side is None and callback is None:
+                self.step_count += n_steps - done - 1
+                break
+        return self
+
+    def _cycle_key(self):
+        # Everything that decides future steps; generator_angle only accumulates
+        # and step_count only matters through its parity (drop alternation).
+        return (
+            self.blocks_top_A, self.blocks_top_B, self.tied_bottom_C, self.tied_bottom_D,
+            self.storage_left, self.storage_right, self.battery1, self.battery2,
+            self.houses_lit, self.step_count % 2,
+        )
+
+    def fast_forward(self, n_steps):
+        """
+        Advance n_steps steps without simulating each one.
+
+        The block/storage counters follow a periodic orbit, and both batteries
+        are saturating accumulators that settle on a fixed point (B1 at 100%,
+        B2 where the big-cycle gain and lift cost balance) after a bounded
+        number of drops. Steps are simulated until the full state repeats, then
+        whole periods are skipped in one jump, so the cost is O(transient +
+        period) instead of O(n_steps). generator_angle is advanced by a
+        multiple of its per-period gain, so it can differ from run() in the
+        last floating-point digits.
+        """
+        seen = {}
+        remaining = n_steps
+        while remaining > 0:
+            key = self._cycle_key()
+            if key in seen:
+                start_remaining, start_angle = seen[key]
+                period = start_remaining - remaining
+                periods = remaining // period
+                self.generator_angle += periods * (self.generator_angle - start_angle)
+                self.step_count += periods * period
+                return self.run(remaining - periods * period)
+            seen[key] = (remaining, self.generator_angle)
+            result = self.step()
+            remaining -= 1
+            if result.side is None:
+                self.step_count += remaining
+                break
+        return self
@@ -0,0 +1,159 @@
+"""
+Streaming per-step telemetry in a columnar on-disk format.
+
+A telemetry directory holds one raw little-endian file per column plus a
+meta.json with the dtypes and row count. TelemetrySink buffers one tuple per
+step and converts a full chunk to columns at once before appending it to
+disk, so the hot path is a single list append. open_telemetry() memory-maps every
+column, so runs far larger than RAM can be analyzed with NumPy directly.
+"""
+import json
+import operator
+import os
+import threading
+import time
+import weakref
+
+import numpy as np
+
+COLUMNS = {
+    "step_count": np.int64,
+    "blocks_top_A": np.int32,
+    "blocks_top_B": np.int32,
+    "tied_bottom_C": np.int32,
+    "tied_bottom_D": np.int32,
+    "storage_left": np.int32,
+    "storage_right": np.int32,
+    "battery1": np.float64,
+    "battery2": np.float64,
+    "generator_angle": np.float64,
+    "houses_lit": np.bool_,
+    "drop_energy": np.float64,  # J generated by this step's small drop (0 if none)
+    "big_cycle_energy": np.float64,  # J generated by this step's big cycle (0 if none)
+}
+STATE_COLUMNS = tuple(name for name in COLUMNS if not name.endswith("_energy"))
+ROW_DTYPE = np.dtype(list(COLUMNS.items()))
+META_FILE = "meta.json"
+
+
+class _ColumnFiles:
+    """The column files of one telemetry directory and the rows not yet appended to them."""
+
+    def __init__(self, directory):
+        if os.path.exists(os.path.join(directory, META_FILE)):
+            raise FileExistsError(f"{directory} already holds telemetry; use a new directory per run")
+        self.directory = directory
+        self.rows = 0
+        self.lock = threading.Lock()
+        self.pending = []  # row tuples, converted to columns in one go per chunk
+        self.pending_since = 0.0  # time.monotonic() when the oldest pending row was added
+        for name in COLUMNS:
+            open(self.path(name), "wb").close()
+        self.write_meta()
+
+    def path(self, name):
+        return os.path.join(self.directory, f"{name}.bin")
+
+    def write_meta(self):
+        meta = {"rows": self.rows, "columns": {name: np.dtype(dtype).str for name, dtype in COLUMNS.items()}}
+        with open(os.path.join(self.directory, META_FILE), "w") as f:
+            json.dump(meta, f)
+
+    def flush(self):
+        with self.lock:
+            self.flush_locked()
+
+    def flush_locked(self):
+        if not self.pending:
+            return
+        chunk = np.array(self.pending, dtype=ROW_DTYPE)
+        for name in COLUMNS:
+            with open(self.path(name), "ab") as f:
+                f.write(np.ascontiguousarray(chunk[name]).tobytes())
+        self.rows += len(chunk)
+        self.pending = []
+        self.write_meta()
+
+
+class TelemetrySink:
+    """
+    Appends one row per step to the columns in `directory`.
+
+    record(sim, result) takes anything exposing the state fields as
+    attributes (a GravityBatterySimulator or st.session_state) plus the step's
+    StepResult. Rows are buffered `chunk_size` at a time, or until the oldest
+    buffered row is `flush_interval` seconds old, so slow runs reach the disk
+    too. `directory` must not hold telemetry yet (FileExistsError otherwise).
+    close() (or using the sink as a context manager) writes the last
+    partial chunk; a sink that is garbage-collected or still open at
+    interpreter exit is flushed as well.
+    """
+
+    def __init__(self, directory, chunk_size=65536, flush_interval=None):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.flush_interval = flush_interval
+        self._state_of = operator.attrgetter(*STATE_COLUMNS)
+        self._files = _ColumnFiles(directory)
+        # Holds only the files, not the sink, so it can run once the sink is gone
+        weakref.finalize(self, self._files.flush)
+
+    @property
+    def rows(self):
+        """Rows written to disk so far."""
+        return self._files.rows
+
+    def record(self, sim, result, drop_energy=None, big_cycle_energy=None):
+        """
+        Append one row. Energies default to sim.config's when available;
+        pass them explicitly for sources without a config (e.g. session state).
+        """
+        if result.side is None:
+            drop_energy = 0.0
+        elif drop_energy is None:
+            drop_energy = sim.config.drop_energy
+        if not result.big_cycle:
+            big_cycle_energy = 0.0
+        elif big_cycle_energy is None:
+            big_cycle_energy = sim.config.big_cycle_energy
+        row = self._state_of(sim) + (drop_energy, big_cycle_energy)
+        files = self._files
+        with files.lock:
+            if not files.pending:
+                files.pending_since = time.monotonic()
+            files.pending.append(row)
+            if len(files.pending) >= self.chunk_size or (
+                self.flush_interval is not None and time.monotonic() - files.pending_since >= self.flush_interval
+            ):
+                files.flush_locked()
+
+    def recorder(self, sim):
+        """Callback for GravityBatterySimulator.run(callback=...) that records every step of `sim`."""
+        return lambda result: self.record(sim, result)
+
+    def flush(self):
+        self._files.flush()
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_telemetry(directory):
+    """Memory-map every column of a telemetry directory as read-only NumPy arrays."""
+    with open(os.path.join(directory, META_FILE)) as f:
+        meta = json.load(f)
+    rows = meta["rows"]
+    columns = {}
+    for name, dtype in meta["columns"].items():
+        if rows == 0:
+            columns[name] = np.empty(0, dtype=dtype)
+        else:
+            columns[name] = np.memmap(os.path.join(directory, f"{name}.bin"), dtype=dtype, mode="r", shape=(rows,))
+    return columns
@@ -0,0 +1,50 @@
+import pytest
+
+from batch import BatchSimulator, config_grid
+from simulator import STATE_FIELDS, GravityBatterySimulator, SimulationConfig
+
+CONFIG_FIELDS = ("gravity", "height", "b1_capacity", "b2_capacity", "storage_threshold", "max_total_blocks")
+GRID = config_grid(
+    height=[50, 100],
+    b2_capacity=[250_000, 1_000_000],
+    storage_threshold=[10, 40, 80],
+    blocks_top_A=range(4),
+    blocks_top_B=range(4),
+)
+
+
+@pytest.mark.parametrize("n_steps", (1, 2, 25, 300))
+def test_batch_matches_scalar_simulator(n_steps):
+    batch = BatchSimulator(**GRID)
+    for _ in range(n_steps):
+        batch.step()
+    for i in range(batch.n_configs):
+        config = SimulationConfig(**{name: GRID[name][i].item() for name in CONFIG_FIELDS if name in GRID})
+        sim = GravityBatterySimulator(config, blocks_top_A=int(GRID["blocks_top_A"][i]), blocks_top_B=int(GRID["blocks_top_B"][i]))
+        sim.run(n_steps, callback=lambda result: None)
+        for name in STATE_FIELDS:
+            value = batch.step_count if name == "step_count" else getattr(batch, name)[i]
+            assert value == getattr(sim, name), (i, name)
+
+
+def test_history_matches_scalar_simulator():
+    batch = BatchSimulator(**GRID)
+    history = batch.run(60, record_every=20)
+    assert list(history.steps) == [20, 40, 60]
+    for i in (0, 17, batch.n_configs - 1):
+        config = SimulationConfig(**{name: GRID[name][i].item() for name in CONFIG_FIELDS if name in GRID})
+        sim = GravityBatterySimulator(config, blocks_top_A=int(GRID["blocks_top_A"][i]), blocks_top_B=int(GRID["blocks_top_B"][i]))
+        for row in range(3):
+            sim.run(20, callback=lambda result: None)
+            assert history.battery1[row, i] == sim.battery1
+            assert history.battery2[row, i] == sim.battery2
+            assert history.generator_angle[row, i] == sim.generator_angle
+            assert history.houses_lit[row, i] == sim.houses_lit
+
+
+def test_invalid_stacks_never_step():
+    batch = BatchSimulator(blocks_top_A=[2, 15], blocks_top_B=[0, 10])
+    for _ in range(10):
+        batch.step()
+    assert batch.valid.tolist() == [True, False]
+    assert (batch.blocks_top_A[1], batch.blocks_top_B[1], batch.battery1[1]) == (15, 10, 0)
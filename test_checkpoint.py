@@ -0,0 +1,56 @@
+import itertools
+
+import pytest
+
+import checkpoint
+from simulator import STATE_FIELDS, GravityBatterySimulator, SimulationConfig
+
+STACKS = list(itertools.product(range(4), repeat=2)) + [(10, 10)]
+
+
+def assert_same(actual, expected):
+    assert actual.config == expected.config
+    for name in STATE_FIELDS:
+        value, original = getattr(actual, name), getattr(expected, name)
+        assert value == original and type(value) is type(original), name
+
+
+@pytest.mark.parametrize("threshold", (10, 40, 80))
+@pytest.mark.parametrize("blocks_top_A, blocks_top_B", STACKS)
+@pytest.mark.parametrize("n_steps", (0, 1, 7, 1001))
+def test_round_trip_resumes_exactly(blocks_top_A, blocks_top_B, threshold, n_steps):
+    config = SimulationConfig(storage_threshold=threshold, height=75.5)
+    sim = GravityBatterySimulator(config, blocks_top_A=blocks_top_A, blocks_top_B=blocks_top_B).run(n_steps)
+    data = checkpoint.dumps(sim)
+    assert len(data) == checkpoint.SIZE
+    loaded = checkpoint.loads(data)
+    assert_same(loaded, sim)
+    assert_same(loaded.run(333), sim.run(333))
+
+
+@pytest.mark.parametrize("blocks_top_A, blocks_top_B", STACKS)
+def test_replay_matches_uninterrupted_run(blocks_top_A, blocks_top_B):
+    sim = GravityBatterySimulator(blocks_top_A=blocks_top_A, blocks_top_B=blocks_top_B).run(100)
+    replayed = checkpoint.replay(checkpoint.loads(checkpoint.dumps(sim)), 2500)
+    assert replayed.step_count == 2500
+    assert_same(replayed, GravityBatterySimulator(blocks_top_A=blocks_top_A, blocks_top_B=blocks_top_B).run(2500))
+    with pytest.raises(ValueError):
+        checkpoint.replay(replayed, 2499)
+
+
+def test_save_and_load(tmp_path):
+    sim = GravityBatterySimulator().run(12345)
+    path = tmp_path / "run.gbck"
+    checkpoint.save(sim, path)
+    assert_same(checkpoint.load(path), sim)
+    assert [p.name for p in tmp_path.iterdir()] == ["run.gbck"]
+
+
+@pytest.mark.parametrize("damage", [
+    lambda data: data[:-1],
+    lambda data: data[:10] + bytes([data[10] ^ 1]) + data[11:],
+    lambda data: b"XXXX" + data[4:],
+])
+def test_invalid_checkpoints_are_rejected(damage):
+    with pytest.raises(ValueError):
+        checkpoint.loads(damage(checkpoint.dumps(GravityBatterySimulator().run(10))))
@@ -0,0 +1,71 @@
+import pytest
+
+from event_log import EventLog, read_spill
+from simulator import GravityBatterySimulator
+
+
+def fill(log, n_steps):
+    """Log a run the way the app does: state, drop and big-cycle events plus UTF-8 messages."""
+    sim = GravityBatterySimulator(blocks_top_A=2, blocks_top_B=2)
+    log.message("Simulation started ⚡ — ünïcode", sim.to_state())
+    for _ in range(n_steps):
+        log.record("state", sim.to_state())
+        result = sim.step()
+        if result.side is None:
+            log.message("No drop condition met, checking again...", sim.to_state())
+            continue
+        log.record("drop", sim.to_state(), side=result.side, mass_kg=result.lifted * 10, energy=sim.config.drop_energy)
+        if result.big_cycle:
+            log.record("big_cycle_start", sim.to_state(), mass_kg=80)
+            log.record("big_cycle", sim.to_state(), energy=sim.config.big_cycle_energy)
+    log.message("Simulation stopped.")
+
+
+def test_ring_buffer_keeps_the_latest_events():
+    full = EventLog(capacity=100_000)
+    ring = EventLog(capacity=50)
+    fill(full, 200)
+    fill(ring, 200)
+    assert len(full) > 50
+    assert len(ring) == 50
+    assert [event.text() for event in ring.events()] == [event.text() for event in full.events(last=50)]
+    assert ring.text(last=7) == full.text(last=7)
+    assert ring.text(last=1000) == full.text(last=50)
+
+
+def test_clear():
+    log = EventLog(capacity=10)
+    fill(log, 20)
+    log.clear()
+    assert len(log) == 0 and log.events() == [] and log.text() == ""
+    log.message("again")
+    assert log.text() == "again"
+
+
+@pytest.mark.parametrize("spill_batch", (1, 7, 256))
+def test_spill_round_trip(tmp_path, spill_batch):
+    path = tmp_path / "events.bin"
+    log = EventLog(capacity=20, spill_path=path, spill_batch=spill_batch)
+    reference = EventLog(capacity=100_000)
+    fill(log, 150)
+    fill(reference, 150)
+    log.flush()  # the last, partial batch
+    spilled = list(read_spill(path))
+    assert len(spilled) == len(reference) > log.capacity
+    assert [event.text() for event in spilled] == [event.text() for event in reference.events()]
+    for event, original in zip(spilled, reference.events()):
+        for name in original.__slots__:
+            value = getattr(original, name)
+            assert getattr(event, name) == value and type(getattr(event, name)) is type(value), name
+    assert any(event.side is None for event in spilled)
+    assert spilled[0].detail == "Simulation started ⚡ — ünïcode"
+
+
+def test_clear_flushes_the_spill(tmp_path):
+    path = tmp_path / "events.bin"
+    log = EventLog(capacity=5, spill_path=path, spill_batch=1000)
+    reference = EventLog(capacity=100_000)
+    fill(log, 10)
+    fill(reference, 10)
+    log.clear()
+    assert [event.text() for event in read_spill(path)] == [event.text() for event in reference.events()]
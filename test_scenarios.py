@@ -0,0 +1,67 @@
+import os
+import tempfile
+
+import numpy as np
+import pytest
+
+import scenarios
+from batch import BatchSimulator, config_grid
+from scenarios import run_scenarios
+
+GRID = config_grid(
+    storage_threshold=[10, 40, 80],
+    blocks_top_A=range(4),
+    blocks_top_B=range(4),
+)
+CONFIGS = [{name: values[i].item() for name, values in GRID.items()} for i in range(len(GRID["blocks_top_A"]))]
+N_STEPS = 300
+RECORD_EVERY = 3
+
+
+def check_results(results):
+    """Bit-exact against one BatchSimulator over every config, plus the per-worker totals."""
+    expected = BatchSimulator(**GRID).run(N_STEPS, RECORD_EVERY)
+    for name in expected._fields:
+        assert np.array_equal(getattr(results.history, name), getattr(expected, name)), name
+    assert results.history.houses_lit.dtype == bool
+    assert results.history.battery1.shape == (N_STEPS // RECORD_EVERY, len(CONFIGS))
+
+    assert 1 <= len(results.workers) <= 2
+    assert len({stats.pid for stats in results.workers}) == len(results.workers)
+    assert os.getpid() not in {stats.pid for stats in results.workers}
+    assert sum(stats.scenarios for stats in results.workers) == len(CONFIGS)
+    assert sum(stats.steps for stats in results.workers) == len(CONFIGS) * N_STEPS
+    for stats in results.workers:
+        assert stats.steps == stats.scenarios * N_STEPS
+        assert stats.steps_per_second > 0
+
+
+@pytest.mark.parametrize("chunk_size", (None, 7))
+def test_shared_memory(chunk_size):
+    results = run_scenarios(CONFIGS, N_STEPS, workers=2, record_every=RECORD_EVERY, chunk_size=chunk_size)
+    assert not isinstance(results.history.battery1, np.memmap)
+    check_results(results)
+
+
+def test_temporary_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(scenarios, "SHARED_MEMORY_LIMIT", 0)
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    results = run_scenarios(CONFIGS, N_STEPS, workers=2, record_every=RECORD_EVERY)
+    assert isinstance(results.history.battery1, np.memmap)
+    assert list(tmp_path.iterdir()) == []  # removed once mapped
+    check_results(results)
+
+
+def test_out_path(tmp_path):
+    path = tmp_path / "results.npy"
+    results = run_scenarios(CONFIGS, N_STEPS, workers=2, record_every=RECORD_EVERY, out_path=path)
+    check_results(results)
+    saved = np.load(path)
+    assert saved.shape == (len(scenarios.SERIES), N_STEPS // RECORD_EVERY, len(CONFIGS))
+    assert np.array_equal(saved[0], results.history.battery1)
+    assert np.array_equal(saved[3].astype(bool), results.history.houses_lit)
+
+
+def test_unknown_parameter():
+    with pytest.raises(TypeError, match="Scenario 1"):
+        run_scenarios([{}, {"colour": 1}], 10, workers=1)
@@ -0,0 +1,33 @@
+import itertools
+
+import pytest
+
+from simulator import STATE_FIELDS, GravityBatterySimulator, SimulationConfig
+
+STACKS = list(itertools.product(range(4), repeat=2)) + [(2, 5), (10, 10), (20, 0)]
+THRESHOLDS = (10, 40, 80, 120)
+STEPS = (0, 1, 2, 7, 100, 1001, 50_000)
+
+
+@pytest.mark.parametrize("threshold", THRESHOLDS)
+@pytest.mark.parametrize("blocks_top_A, blocks_top_B", STACKS)
+@pytest.mark.parametrize("n_steps", STEPS)
+def test_fast_forward_matches_run(blocks_top_A, blocks_top_B, threshold, n_steps):
+    config = SimulationConfig(storage_threshold=threshold)
+    expected = GravityBatterySimulator(config, blocks_top_A=blocks_top_A, blocks_top_B=blocks_top_B).run(n_steps)
+    actual = GravityBatterySimulator(config, blocks_top_A=blocks_top_A, blocks_top_B=blocks_top_B).fast_forward(n_steps)
+    for name in STATE_FIELDS:
+        if name == "generator_angle":
+            # Advanced by whole periods at once, so only the last digits may differ
+            assert actual.generator_angle == pytest.approx(expected.generator_angle, rel=1e-9)
+        else:
+            assert getattr(actual, name) == getattr(expected, name), name
+
+
+@pytest.mark.parametrize("blocks_top_A, blocks_top_B", STACKS)
+def test_run_skips_idle_steps_like_step(blocks_top_A, blocks_top_B):
+    stepped = GravityBatterySimulator(blocks_top_A=blocks_top_A, blocks_top_B=blocks_top_B)
+    for _ in range(500):
+        stepped.step()
+    ran = GravityBatterySimulator(blocks_top_A=blocks_top_A, blocks_top_B=blocks_top_B).run(500)
+    assert ran.to_state() == stepped.to_state()
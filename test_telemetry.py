@@ -0,0 +1,89 @@
+import gc
+
+import numpy as np
+import pytest
+
+import telemetry
+from simulator import GravityBatterySimulator, SimulationConfig
+from telemetry import COLUMNS, STATE_COLUMNS, TelemetrySink, open_telemetry
+
+
+def recorded_run(directory, n_steps, chunk_size, config=None, **state):
+    """Record a run through recorder() and return the per-step rows it should have produced."""
+    sim = GravityBatterySimulator(config, **state)
+    sink = TelemetrySink(directory, chunk_size=chunk_size)
+    record = sink.recorder(sim)
+    expected = []
+
+    def step(result):
+        record(result)
+        row = {name: getattr(sim, name) for name in STATE_COLUMNS}
+        row["drop_energy"] = sim.config.drop_energy if result.side is not None else 0.0
+        row["big_cycle_energy"] = sim.config.big_cycle_energy if result.big_cycle else 0.0
+        expected.append(row)
+
+    sim.run(n_steps, callback=step)
+    return sink, expected
+
+
+@pytest.mark.parametrize("blocks_top_A, blocks_top_B", [(1, 2), (2, 2), (0, 0)])
+@pytest.mark.parametrize("chunk_size", (1, 7, 64))
+def test_columns_match_simulator(tmp_path, blocks_top_A, blocks_top_B, chunk_size):
+    config = SimulationConfig(height=75.5)
+    sink, expected = recorded_run(tmp_path, 500, chunk_size, config, blocks_top_A=blocks_top_A, blocks_top_B=blocks_top_B)
+    # Only whole chunks are on disk until close()
+    assert sink.rows == 500 - 500 % chunk_size
+    sink.close()
+    columns = open_telemetry(tmp_path)
+    assert set(columns) == set(COLUMNS)
+    for name, dtype in COLUMNS.items():
+        assert columns[name].dtype == np.dtype(dtype)
+        assert columns[name].tolist() == [row[name] for row in expected], name
+    assert columns["step_count"].tolist() == list(range(1, 501))
+
+
+def test_energy_columns(tmp_path):
+    sink, expected = recorded_run(tmp_path, 1000, 100)
+    sink.close()
+    columns = open_telemetry(tmp_path)
+    config = SimulationConfig()
+    assert np.count_nonzero(columns["drop_energy"]) == sum(row["drop_energy"] > 0 for row in expected) > 0
+    assert np.count_nonzero(columns["big_cycle_energy"]) == sum(row["big_cycle_energy"] > 0 for row in expected) > 0
+    assert set(columns["drop_energy"].tolist()) <= {0.0, config.drop_energy}
+    assert set(columns["big_cycle_energy"].tolist()) == {0.0, config.big_cycle_energy}
+
+
+def test_flush_interval(tmp_path, monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(telemetry.time, "monotonic", lambda: now[0])
+    sim = GravityBatterySimulator()
+    sink = TelemetrySink(tmp_path, chunk_size=1000, flush_interval=5.0)
+    record = sink.recorder(sim)
+    sim.run(3, callback=record)
+    assert sink.rows == 0
+    now[0] += 5.0
+    sim.run(1, callback=record)
+    assert sink.rows == 4
+    assert open_telemetry(tmp_path)["step_count"].tolist() == [1, 2, 3, 4]
+
+
+def test_dropped_sink_is_flushed(tmp_path):
+    sink, expected = recorded_run(tmp_path, 10, 1000)
+    assert sink.rows == 0
+    del sink
+    gc.collect()
+    assert open_telemetry(tmp_path)["step_count"].tolist() == [row["step_count"] for row in expected]
+
+
+def test_empty_run(tmp_path):
+    with TelemetrySink(tmp_path):
+        pass
+    assert all(len(column) == 0 for column in open_telemetry(tmp_path).values())
+
+
+def test_existing_telemetry_is_not_overwritten(tmp_path):
+    sink, _ = recorded_run(tmp_path, 10, 4)
+    sink.close()
+    with pytest.raises(FileExistsError):
+        TelemetrySink(tmp_path)
+    assert len(open_telemetry(tmp_path)["step_count"]) == 10
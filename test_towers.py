@@ -0,0 +1,52 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from simulator import GravityBatterySimulator, SimulationConfig
+from towers import BIG_CYCLE_MODES, TowerArray
+
+STACKS = list(itertools.product(range(4), repeat=2)) + [(10, 10)]
+THRESHOLDS = (10, 40, 80)
+
+
+@pytest.mark.parametrize("big_cycle", BIG_CYCLE_MODES)
+@pytest.mark.parametrize("threshold", THRESHOLDS)
+@pytest.mark.parametrize("blocks_top_A, blocks_top_B", STACKS)
+@pytest.mark.parametrize("n_steps", (1, 2, 25, 500))
+def test_one_tower_matches_scalar_simulator(blocks_top_A, blocks_top_B, threshold, big_cycle, n_steps):
+    config = SimulationConfig(storage_threshold=threshold)
+    towers = TowerArray(1, blocks_top_A, blocks_top_B, big_cycle=big_cycle, config=config).run(n_steps)
+    sim = GravityBatterySimulator(config, blocks_top_A=blocks_top_A, blocks_top_B=blocks_top_B)
+    sim.run(n_steps, callback=lambda result: None)
+    assert towers.tower_state(0) == sim.to_state()
+
+
+def test_towers_move_blocks_independently():
+    rng = np.random.default_rng(1)
+    stacks_a, stacks_b = rng.integers(0, 3, 200), rng.integers(0, 3, 200)
+    towers = TowerArray(200, stacks_a, stacks_b).run(300)
+    drops = 0
+    for i in range(towers.n_towers):
+        sim = GravityBatterySimulator(blocks_top_A=int(stacks_a[i]), blocks_top_B=int(stacks_b[i]))
+        results = [sim.step() for _ in range(300)]
+        drops += sum(result.side is not None for result in results)
+        state = towers.tower_state(i)
+        for name in ("blocks_top_A", "blocks_top_B", "tied_bottom_C", "tied_bottom_D", "storage_left", "storage_right"):
+            assert state[name] == getattr(sim, name), (i, name)
+    assert towers.total_drops == drops
+    assert towers.totals()["drops"] == drops
+
+
+def test_pooled_big_cycles_empty_every_tower():
+    towers = TowerArray(4, 2, 0, big_cycle="pooled", pool_threshold=40, config=SimulationConfig(storage_threshold=20))
+    result = towers.step()
+    # 4 towers x 10kg reach the pool threshold: one big cycle per 20kg stored
+    assert result.drops == 4 and result.big_cycles == 2
+    assert towers.totals()["storage_kg"] == 0
+    assert towers.battery2 > 0
+
+
+def test_unknown_big_cycle_mode():
+    with pytest.raises(ValueError):
+        TowerArray(1, big_cycle="never")
@@ -0,0 +1,146 @@
+"""
+Array of A/B seesaw towers feeding shared battery banks.
+
+TowerArray keeps the block counters of N towers in compact NumPy arrays and
+applies the drop rules to all of them at once (see batch.drop_masks), while
+battery1, battery2, generator_angle and houses_lit are single values shared
+by the whole site. Big cycles are triggered either per tower, when a tower's
+own storage reaches the threshold, or pooled, when the storage of all towers
+together reaches a site-wide threshold.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from batch import drop_masks, move_blocks
+from simulator import BIG_LIFT_JOULES, INITIAL_STATE, SimulationConfig
+
+BIG_CYCLE_MODES = ("tower", "pooled")
+
+# drops/big_cycles: how many towers dropped / how many big cycles ran in this step
+TowerStep = namedtuple("TowerStep", ["step", "drops", "big_cycles"])
+
+
+class TowerArray:
+    """
+    N seesaw towers stepped together, all charging the same B1/B2 banks.
+
+    blocks_top_A/blocks_top_B take a scalar or one value per tower; towers
+    whose initial stacks exceed config.max_total_blocks never step. The bank
+    capacities default to the per-tower capacities of `config` times the
+    number of towers, so percentages stay comparable with a single pair; with
+    one tower the run matches GravityBatterySimulator exactly. In "pooled"
+    mode a step whose total storage reaches `pool_threshold` (default: the
+    per-tower threshold times the number of towers) runs one big cycle per
+    storage_threshold kg stored and empties every tower's storage.
+    """
+
+    def __init__(self, n_towers=None, blocks_top_A=INITIAL_STATE["blocks_top_A"], blocks_top_B=INITIAL_STATE["blocks_top_B"],
+                 big_cycle="tower", pool_threshold=None, b1_bank=None, b2_bank=None, config=None):
+        if big_cycle not in BIG_CYCLE_MODES:
+            raise ValueError(f"big_cycle must be one of {', '.join(BIG_CYCLE_MODES)}, got {big_cycle!r}")
+        blocks_top_A, blocks_top_B = np.asarray(blocks_top_A), np.asarray(blocks_top_B)
+        if n_towers is None:
+            n_towers = max(blocks_top_A.size, blocks_top_B.size)
+        shape = (n_towers,)
+        self.n_towers = n_towers
+        self.config = config = config or SimulationConfig()
+        self.big_cycle = big_cycle
+        self.pool_threshold = config.storage_threshold * n_towers if pool_threshold is None else pool_threshold
+        self.b1_bank = config.b1_capacity * n_towers if b1_bank is None else b1_bank
+        self.b2_bank = config.b2_capacity * n_towers if b2_bank is None else b2_bank
+        # Bank increments per drop / big cycle, in the same order as the scalar simulator
+        self.b1_gain = (config.drop_energy / self.b1_bank) * 100
+        self.drop_angle = (config.drop_energy / self.b1_bank) * 360
+        self.b2_gain = (config.big_cycle_energy / self.b2_bank) * 100
+        self.big_angle = (config.big_cycle_energy / self.b2_bank) * 360
+        self.b2_lift_cost = (BIG_LIFT_JOULES / self.b2_bank) * 100
+
+        self.blocks_top_A = np.broadcast_to(blocks_top_A, shape).astype(np.int16)
+        self.blocks_top_B = np.broadcast_to(blocks_top_B, shape).astype(np.int16)
+        self.valid = self.blocks_top_A + self.blocks_top_B <= config.max_total_blocks
+        self.tied_bottom_C = np.zeros(shape, dtype=np.int16)
+        self.tied_bottom_D = np.zeros(shape, dtype=np.int16)
+        self.storage_left = np.zeros(shape, dtype=np.int32)
+        self.storage_right = np.zeros(shape, dtype=np.int32)
+        self.battery1 = INITIAL_STATE["battery1"]
+        self.battery2 = INITIAL_STATE["battery2"]
+        self.generator_angle = INITIAL_STATE["generator_angle"]
+        self.houses_lit = INITIAL_STATE["houses_lit"]
+        self.step_count = 0
+        self.total_drops = 0
+        self.total_big_cycles = 0
+        self.last_step = TowerStep(0, 0, 0)
+
+    def step(self):
+        self.step_count += 1
+        left, right = drop_masks(self.blocks_top_A, self.blocks_top_B, self.step_count, self.valid)
+        dropped = left | right
+        drops = int(np.count_nonzero(dropped))
+        if drops == 0:
+            self.last_step = TowerStep(self.step_count, 0, 0)
+            return self.last_step
+        move_blocks(self, left, right)
+
+        self.battery1 = min(self.battery1 + drops * self.b1_gain, 100)
+        self.generator_angle += drops * self.drop_angle
+        self.houses_lit = self.battery1 >= 10
+
+        stored = self.storage_left + self.storage_right
+        if self.big_cycle == "tower":
+            big = dropped & (stored >= self.config.storage_threshold)
+            big_cycles = int(np.count_nonzero(big))
+            if big_cycles:
+                self.storage_left[big] = 0
+                self.storage_right[big] = 0
+        else:
+            total = int(stored.sum())
+            big_cycles = total // self.config.storage_threshold if total >= self.pool_threshold else 0
+            if big_cycles:
+                self.storage_left[:] = 0
+                self.storage_right[:] = 0
+        if big_cycles:
+            # All of this step's big cycles charge B2 together, then their lifts are paid
+            self.generator_angle += big_cycles * self.big_angle
+            self.battery2 = min(self.battery2 + big_cycles * self.b2_gain, 100)
+            self.battery2 = max(self.battery2 - big_cycles * self.b2_lift_cost, 0)
+        self.total_drops += drops
+        self.total_big_cycles += big_cycles
+        self.last_step = TowerStep(self.step_count, drops, big_cycles)
+        return self.last_step
+
+    def run(self, n_steps, callback=None):
+        """Advance n_steps steps, calling callback(result) after each one if given."""
+        for _ in range(n_steps):
+            result = self.step()
+            if callback is not None:
+                callback(result)
+        return self
+
+    def tower_state(self, i):
+        """STATE_FIELDS of tower `i` with the shared bank values, e.g. to render it like a single pair."""
+        return {
+            "blocks_top_A": int(self.blocks_top_A[i]),
+            "blocks_top_B": int(self.blocks_top_B[i]),
+            "tied_bottom_C": int(self.tied_bottom_C[i]),
+            "tied_bottom_D": int(self.tied_bottom_D[i]),
+            "storage_left": int(self.storage_left[i]),
+            "storage_right": int(self.storage_right[i]),
+            "battery1": self.battery1,
+            "battery2": self.battery2,
+            "generator_angle": self.generator_angle,
+            "houses_lit": self.houses_lit,
+            "step_count": self.step_count,
+        }
+
+    def totals(self):
+        """Site-wide aggregates for display."""
+        return {
+            "towers": self.n_towers,
+            "dropped_last_step": self.last_step.drops,
+            "blocks_top": int(self.blocks_top_A.sum(dtype=np.int64) + self.blocks_top_B.sum(dtype=np.int64)),
+            "blocks_tied": int(self.tied_bottom_C.sum(dtype=np.int64) + self.tied_bottom_D.sum(dtype=np.int64)),
+            "storage_kg": int(self.storage_left.sum(dtype=np.int64) + self.storage_right.sum(dtype=np.int64)),
+            "drops": self.total_drops,
+            "big_cycles": self.total_big_cycles,
+        }